@@ -1,6 +1,6 @@
 from fastapi import APIRouter
 
-from app.api.endpoints import auth, torrents, watchlist
+from app.api.endpoints import auth, jobs, torrents, watchlist
 
 api_router = APIRouter()
 
@@ -11,3 +11,4 @@ api_router.include_router(
 api_router.include_router(
     torrents.router, prefix="/torrents", tags=["Torrents & qBittorrent"]
 )
+api_router.include_router(jobs.router, prefix="/jobs", tags=["Jobs"])
@@ -1,14 +1,16 @@
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from sqlalchemy.ext.asyncio import AsyncSession
-from typing import Annotated
+from typing import Annotated, Optional
 
 from app.core import security
+from app.core.auth_cache import AuthState, auth_cache
 from app.db.base import get_db
 from app.db.repository.user_repo import UserRepository
 from app.db.repository.token_repo import AnilistTokenRepository
 from app.db.repository.torrent_repo import TorrentRepository
-from app.db.models import User
+from app.db.repository.job_repo import JobRepository
+from app.schemas import user as user_schema
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/v1/auth/token")
 
@@ -30,14 +32,24 @@ def get_torrent_repository(db: DBSession) -> TorrentRepository:
     return TorrentRepository(db)
 
 
+def get_job_repository(db: DBSession) -> JobRepository:
+    """Dependency function that provides a JobRepository instance."""
+    return JobRepository(db)
+
+
 UserRepoDep = Annotated[UserRepository, Depends(get_user_repository)]
 TokenRepoDep = Annotated[AnilistTokenRepository, Depends(get_token_repository)]
 TorrentRepoDep = Annotated[TorrentRepository, Depends(get_torrent_repository)]
+JobRepoDep = Annotated[JobRepository, Depends(get_job_repository)]
 
 
-async def get_current_user(
+async def get_auth_state(
     db: DBSession, token: Annotated[str, Depends(oauth2_scheme)]
-) -> User:
+) -> AuthState:
+    """
+    Resolves the bearer token to the user's auth state. The state is cached per
+    user for AUTH_CACHE_TTL seconds, so most requests need no DB query for auth.
+    """
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
@@ -47,26 +59,40 @@ async def get_current_user(
     if token_data is None or token_data.user_id is None:
         raise credentials_exception
 
-    user_repo = UserRepository(db)
-    user = await user_repo.get_user_by_id(user_id=token_data.user_id)
-    if user is None or not user.is_active:
+    async def load() -> Optional[AuthState]:
+        user_repo = UserRepository(db)
+        user, anilist_token = await user_repo.get_user_with_anilist_token(
+            user_id=token_data.user_id
+        )
+        if user is None:
+            return None
+        return AuthState(
+            user=user_schema.User.model_validate(user), anilist_token=anilist_token
+        )
+
+    state = await auth_cache.get_or_fetch(token_data.user_id, load)
+    if state is None or not state.user.is_active:
         raise credentials_exception
-    return user
+    return state
 
 
-CurrentUser = Annotated[User, Depends(get_current_user)]
+CurrentAuthState = Annotated[AuthState, Depends(get_auth_state)]
 
 
-async def get_current_anilist_token(
-    current_user: CurrentUser, token_repo: TokenRepoDep
-) -> str:
-    anilist_token_obj = await token_repo.get_token(user_id=current_user.id)
-    if not anilist_token_obj or not anilist_token_obj.access_token:
+async def get_current_user(auth_state: CurrentAuthState) -> user_schema.User:
+    return auth_state.user
+
+
+CurrentUser = Annotated[user_schema.User, Depends(get_current_user)]
+
+
+async def get_current_anilist_token(auth_state: CurrentAuthState) -> str:
+    if not auth_state.anilist_token:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Anilist token not found or is invalid for this user. Please link your account via POST /api/v1/auth/anilist/link.",
         )
-    return anilist_token_obj.access_token
+    return auth_state.anilist_token
 
 
 CurrentAnilistToken = Annotated[str, Depends(get_current_anilist_token)]
@@ -74,7 +100,7 @@ CurrentAnilistToken = Annotated[str, Depends(get_current_anilist_token)]
 
 async def get_current_active_admin(
     current_user: CurrentUser,
-) -> User:
+) -> user_schema.User:
     if not current_user.is_admin:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
@@ -83,7 +109,7 @@ async def get_current_active_admin(
     return current_user
 
 
-CurrentAdminUser = Annotated[User, Depends(get_current_active_admin)]
+CurrentAdminUser = Annotated[user_schema.User, Depends(get_current_active_admin)]
 
 
 async def verify_torrent_ownership(
@@ -10,6 +10,7 @@ from app.api.deps import (
     UserRepoDep,
     TokenRepoDep,
     CurrentUser,
+    CurrentAdminUser,
     CurrentAnilistToken,
 )
 
@@ -37,7 +38,7 @@ async def create_user_signup(
             status_code=status.HTTP_400_BAD_REQUEST, detail="Email already registered."
         )
 
-    hashed_password = security.get_password_hash(user_in.password)
+    hashed_password = await security.hash_password(user_in.password)
     user = await user_repo.create_user(user_in=user_in, hashed_password=hashed_password)
     return user
 
@@ -51,16 +52,20 @@ async def login_for_access_token(
     OAuth2 compatible token login, get an access token for future requests.
     """
     user = await user_repo.get_user_by_username(username=form_data.username)
-    if (
-        not user
-        or not security.verify_password(form_data.password, user.hashed_password)
-        or not user.is_active
-    ):
+    valid, new_hash = False, None
+    if user:
+        valid, new_hash = await security.verify_and_update_password(
+            form_data.password, user.hashed_password
+        )
+    if not user or not valid or not user.is_active:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect username or password",
             headers={"WWW-Authenticate": "Bearer"},
         )
+    if new_hash:
+        # The stored hash uses an outdated cost factor; upgrade it transparently.
+        await user_repo.update_password_hash(user_id=user.id, hashed_password=new_hash)
     access_token = security.create_access_token(
         data={"sub": user.username, "id": user.id}
     )
@@ -92,6 +97,39 @@ async def link_anilist_account(
     return {"msg": "Anilist token saved successfully."}
 
 
+@router.delete("/anilist/link", response_model=msg_schema.Msg)
+async def unlink_anilist_account(current_user: CurrentUser, token_repo: TokenRepoDep):
+    """
+    Remove the user's stored Anilist access token.
+    """
+    deleted = await token_repo.delete_token(user_id=current_user.id)
+    if not deleted:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="No Anilist token is linked to this user.",
+        )
+    return {"msg": "Anilist token removed."}
+
+
+@router.post("/users/{user_id}/active", response_model=msg_schema.Msg)
+async def set_user_active(
+    user_id: int,
+    is_active: bool,
+    current_admin: CurrentAdminUser,
+    user_repo: UserRepoDep,
+):
+    """
+    (Admin) Activate or deactivate a user. Deactivated users are rejected on their
+    next request (at most AUTH_CACHE_TTL seconds later on other app instances).
+    """
+    updated = await user_repo.set_user_active(user_id=user_id, is_active=is_active)
+    if not updated:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="User not found."
+        )
+    return {"msg": f"User {user_id} is now {'active' if is_active else 'inactive'}."}
+
+
 @router.get("/anilist/test", response_model=msg_schema.Msg)
 async def test_anilist_token(
     anilist_token: CurrentAnilistToken,
@@ -100,7 +138,7 @@ async def test_anilist_token(
     from app.services.anilist_service import anilist_service
 
     try:
-        viewer_id = await anilist_service.get_viewer_id(anilist_token)
+        viewer_id = await anilist_service.get_viewer_id(anilist_token, refresh=True)
         return {"msg": f"Anilist token is valid. Viewer ID: {viewer_id}"}
     except HTTPException as e:
         raise e
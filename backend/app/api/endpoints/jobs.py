@@ -0,0 +1,20 @@
+from fastapi import APIRouter, HTTPException, status
+
+from app.api.deps import CurrentUser, JobRepoDep
+from app.schemas import job as job_schema
+
+router = APIRouter()
+
+
+@router.get("/{job_id}", response_model=job_schema.DownloadJob)
+async def get_job(job_id: int, current_user: CurrentUser, job_repo: JobRepoDep):
+    """
+    Get the status of one of the current user's download jobs.
+    """
+    job = await job_repo.get_job_for_user(user_id=current_user.id, job_id=job_id)
+    if job is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Job not found.",
+        )
+    return job
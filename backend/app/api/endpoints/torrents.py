@@ -1,34 +1,95 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
-from typing import List, Annotated
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status, Query
+from fastapi.responses import ORJSONResponse, StreamingResponse
+from typing import List, Annotated, Optional
+import json
 
 from app.api.deps import CurrentUser, CurrentAdminUser, TorrentRepoDep
+from app.core.etag import conditional, digest, make_etag
 from app.schemas import torrent as torrent_schema
 from app.schemas import msg as msg_schema
-from app.services.qbittorrent_service import qbittorrent_service
+from app.services.qbittorrent_service import STATE_FILTERS, qbittorrent_service
+from app.services.torrent_state_cache import torrent_state_cache
 
 router = APIRouter()
 
+STREAM_KEEPALIVE_SECONDS = 15.0
+
 
 @router.get("/", response_model=List[torrent_schema.TorrentInfo])
 async def get_user_torrents(
+    request: Request,
+    response: Response,
     current_user: CurrentUser,
     torrent_repo: TorrentRepoDep,
+    limit: Optional[int] = Query(
+        None,
+        ge=1,
+        le=torrent_schema.MAX_PAGE_SIZE,
+        description="Page size; omit for the whole list.",
+    ),
+    offset: int = Query(0, ge=0),
+    sort: Optional[torrent_schema.TorrentSortField] = Query(
+        None, description="Field to sort by; omit to keep the stored order."
+    ),
+    reverse: bool = Query(False, description="Sort in descending order."),
+    filter: torrent_schema.TorrentStateFilter = Query(
+        "all", description="Only torrents in this state (as in qBittorrent's filters)."
+    ),
 ):
     """
     Get list of torrents managed by qBittorrent associated with the current user.
+    Without parameters the whole list is returned, as before. limit/offset page
+    through it (e.g. sort=added_on&reverse=true for the newest first); the total
+    number of matching torrents is returned in the X-Total-Count header. Supports If-None-Match: when none of the user's
+    torrents or links changed, the answer is 304 Not Modified.
     """
     user_torrent_hashes = await torrent_repo.get_user_torrent_hashes(
         user_id=current_user.id
     )
     if not user_torrent_hashes:
+        response.headers["X-Total-Count"] = "0"
         return []
 
     try:
-        all_torrents_raw = qbittorrent_service.get_all_torrents_raw()
-        user_torrents_raw = [
-            t for t in all_torrents_raw if t.hash in user_torrent_hashes
-        ]
-        return [qbittorrent_service.map_torrent_info(t) for t in user_torrents_raw]
+        try:
+            # Hash-indexed lookups in the synced state cache.
+            user_torrents_raw = await torrent_state_cache.get_many(user_torrent_hashes)
+            # Read right after get_many (no await in between), so it matches the data.
+            etag = make_etag(
+                "t",
+                torrent_state_cache.version_of(user_torrent_hashes),
+                digest(user_torrent_hashes),
+            )
+            not_modified = conditional(request, response, etag, "torrents")
+            if not_modified is not None:
+                return not_modified
+        except HTTPException as e:
+            print(
+                f"Torrent state cache unavailable ({e.detail}), querying qBittorrent for {len(user_torrent_hashes)} hashes."
+            )
+            user_torrents_raw = await qbittorrent_service.get_torrents_raw(
+                user_torrent_hashes
+            )
+
+        if filter != "all":
+            states = STATE_FILTERS[filter]
+            user_torrents_raw = [
+                t for t in user_torrents_raw if t.get("state") in states
+            ]
+        # Sort the raw dicts and only map the requested page to the response schema.
+        if sort is not None:
+            default = "" if sort in ("name", "state") else 0
+            user_torrents_raw.sort(
+                key=lambda t: t.get(sort) or default, reverse=reverse
+            )
+        response.headers["X-Total-Count"] = str(len(user_torrents_raw))
+        end = None if limit is None else offset + limit
+        page = user_torrents_raw[offset:end]
+        # Plain dicts straight to orjson: no per-torrent model, no response_model pass.
+        return ORJSONResponse(
+            [qbittorrent_service.torrent_info_dict(t) for t in page],
+            headers=dict(response.headers),
+        )
     except HTTPException as e:
         raise e
     except Exception as e:
@@ -38,6 +99,83 @@ async def get_user_torrents(
         )
 
 
+def _sse_event(event: str, data) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+@router.get("/stream")
+async def stream_user_torrents(
+    request: Request,
+    current_user: CurrentUser,
+    torrent_repo: TorrentRepoDep,
+    hashes: Optional[str] = Query(
+        None,
+        description="Comma-separated subset of the user's torrent hashes to watch.",
+    ),
+):
+    """
+    Server-Sent Events stream of progress/state changes for the user's torrents.
+
+    Sends a 'snapshot' event with the current state first, then 'update' events with
+    the torrents that changed and 'removed' events with hashes that left qBittorrent.
+    If qBittorrent cannot be reached for the snapshot, 'error' events are sent and
+    the snapshot is retried.
+    """
+    user_torrent_hashes = set(
+        await torrent_repo.get_user_torrent_hashes(user_id=current_user.id)
+    )
+    if hashes:
+        watched = {h.strip() for h in hashes.split(",") if h.strip()}
+        watched &= user_torrent_hashes
+    else:
+        watched = user_torrent_hashes
+
+    async def event_stream():
+        subscription = torrent_state_cache.subscribe(watched)
+        try:
+            snapshot_sent = False
+            while not await request.is_disconnected():
+                if not snapshot_sent:
+                    try:
+                        snapshot = await torrent_state_cache.get_many(watched)
+                    except Exception as e:
+                        # Headers are already sent: report the failure in-band and
+                        # retry on the next tick instead of breaking the stream.
+                        detail = e.detail if isinstance(e, HTTPException) else str(e)
+                        yield _sse_event("error", {"detail": detail})
+                        await subscription.wait(timeout=STREAM_KEEPALIVE_SECONDS)
+                        continue
+                    snapshot_sent = True
+                    yield _sse_event(
+                        "snapshot",
+                        [qbittorrent_service.torrent_info_dict(t) for t in snapshot],
+                    )
+                    continue
+                changed, removed = await subscription.wait(
+                    timeout=STREAM_KEEPALIVE_SECONDS
+                )
+                if not changed and not removed:
+                    yield ": keep-alive\n\n"
+                    continue
+                updates = [
+                    qbittorrent_service.torrent_info_dict(t)
+                    for t in map(torrent_state_cache.get, changed)
+                    if t is not None
+                ]
+                if updates:
+                    yield _sse_event("update", updates)
+                if removed:
+                    yield _sse_event("removed", sorted(removed))
+        finally:
+            torrent_state_cache.unsubscribe(subscription)
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 @router.post("/", response_model=msg_schema.Msg, status_code=status.HTTP_202_ACCEPTED)
 async def add_torrent_magnet(
     torrent_in: torrent_schema.TorrentAdd,
@@ -45,9 +183,18 @@ async def add_torrent_magnet(
     torrent_repo: TorrentRepoDep,
 ):
     """
-    Add a new torrent via magnet link.
+    Add a new torrent via magnet link. If another user already has the torrent,
+    it is only linked to this user.
     """
-    torrent_hash = qbittorrent_service.add_torrent_source(torrent_in.magnet_link)
+    try:
+        # Downloads .torrent files, so their hash is known before the lock too.
+        source = await qbittorrent_service.resolve_source(torrent_in.magnet_link)
+        if source.info_hash:
+            # Held until the request's transaction ends (see release_torrents).
+            await torrent_repo.lock_torrent_hashes([source.info_hash])
+        torrent_hash = await qbittorrent_service.add_torrent_source(source)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
 
     if not torrent_hash:
         raise HTTPException(
@@ -82,6 +229,50 @@ async def add_torrent_magnet(
     return {"msg": f"Torrent added successfully. Hash: {torrent_hash}"}
 
 
+@router.post("/batch", response_model=torrent_schema.TorrentBatchResult)
+async def batch_torrent_action(
+    batch_in: torrent_schema.TorrentBatchRequest,
+    current_user: CurrentUser,
+    torrent_repo: TorrentRepoDep,
+):
+    """
+    Pause, resume or delete many torrents owned by the user at once.
+    Hashes the user is not linked to are skipped and reported in 'not_owned'.
+    """
+    requested = list(dict.fromkeys(batch_in.hashes))
+    owned = await torrent_repo.get_owned_hashes(
+        user_id=current_user.id, torrent_hashes=requested
+    )
+    owned_hashes = [h for h in requested if h in owned]
+    not_owned = [h for h in requested if h not in owned]
+    shared = []
+
+    if owned_hashes:
+        if batch_in.action == "pause":
+            await qbittorrent_service.pause_torrents(info_hashes=owned_hashes)
+        elif batch_in.action == "resume":
+            await qbittorrent_service.resume_torrents(info_hashes=owned_hashes)
+        elif batch_in.action == "delete":
+            # Unlink first; only torrents nobody else links are removed from qBittorrent.
+            # If that fails the transaction rolls back and the links are restored.
+            orphaned = await torrent_repo.release_torrents(
+                user_id=current_user.id, torrent_hashes=owned_hashes
+            )
+            if orphaned:
+                await qbittorrent_service.delete_torrents(
+                    info_hashes=orphaned, delete_files=batch_in.delete_files
+                )
+                torrent_state_cache.discard(orphaned)
+            shared = [h for h in owned_hashes if h not in set(orphaned)]
+
+    return {
+        "action": batch_in.action,
+        "processed": owned_hashes,
+        "not_owned": not_owned,
+        "shared": shared,
+    }
+
+
 async def verify_torrent_ownership(
     info_hash: str, current_user: CurrentUser, torrent_repo: TorrentRepoDep
 ):
@@ -104,14 +295,14 @@ async def pause_user_torrent(
     info_hash: OwnedTorrentHash,
 ):
     """Pause a specific torrent owned by the user."""
-    qbittorrent_service.pause_torrent(info_hash=info_hash)
+    await qbittorrent_service.pause_torrent(info_hash=info_hash)
     return {"msg": f"Torrent {info_hash} pause request sent."}
 
 
 @router.post("/{info_hash}/resume", response_model=msg_schema.Msg)
 async def resume_user_torrent(info_hash: OwnedTorrentHash):
     """Resume a specific torrent owned by the user."""
-    qbittorrent_service.resume_torrent(info_hash=info_hash)
+    await qbittorrent_service.resume_torrent(info_hash=info_hash)
     return {"msg": f"Torrent {info_hash} resume request sent."}
 
 
@@ -126,9 +317,21 @@ async def delete_user_torrent(
         False, description="Set to true to also delete files from disk."
     ),
 ):
-    """Delete a specific torrent owned by the user (and optionally its files)."""
+    """
+    Delete a specific torrent owned by the user (and optionally its files).
+    The torrent is only removed from qBittorrent once no other user links it;
+    until then this just unlinks it from the user.
+    """
+    orphaned = await torrent_repo.release_torrents(
+        user_id=current_user.id, torrent_hashes=[info_hash]
+    )
+    if not orphaned:
+        return {
+            "msg": f"Torrent {info_hash} removed from your list. It is still used by other users, so it was kept in qBittorrent."
+        }
+
     try:
-        qbittorrent_service.delete_torrent(
+        await qbittorrent_service.delete_torrent(
             info_hash=info_hash, delete_files=delete_files
         )
     except HTTPException as e:
@@ -138,22 +341,8 @@ async def delete_user_torrent(
         raise HTTPException(
             status_code=500, detail="Failed to delete torrent from qBittorrent."
         )
-
-    try:
-        deleted = await torrent_repo.unlink_torrent(
-            user_id=current_user.id, torrent_hash=info_hash
-        )
-        if not deleted:
-            print(
-                f"WARN: Torrent {info_hash} deleted from qBit, but no link found in DB for user {current_user.id} to unlink."
-            )
-    except Exception as e:
-        print(
-            f"CRITICAL: Failed to unlink torrent {info_hash} from user {current_user.id} after successful qBit deletion: {e}"
-        )
-        return {
-            "msg": f"Torrent {info_hash} deleted from qBittorrent, but failed to unlink from DB. Files deleted: {delete_files}. Please check logs."
-        }
+    # The raised errors above roll the unlink back along with the request's session.
+    torrent_state_cache.discard([info_hash])
 
     return {
         "msg": f"Torrent {info_hash} deleted successfully. Files deleted: {delete_files}."
@@ -167,5 +356,7 @@ async def delete_user_torrent(
 )
 async def get_all_torrents_admin():
     """(Admin) Get all torrents currently in qBittorrent."""
-    all_torrents_raw = qbittorrent_service.get_all_torrents_raw()
-    return [qbittorrent_service.map_torrent_info(t) for t in all_torrents_raw]
+    all_torrents_raw = await torrent_state_cache.get_all()
+    return ORJSONResponse(
+        [qbittorrent_service.torrent_info_dict(t) for t in all_torrents_raw]
+    )
@@ -1,28 +1,76 @@
-from fastapi import APIRouter, HTTPException, status
+from fastapi import APIRouter, HTTPException, Request, Response, status
+from fastapi.responses import ORJSONResponse
+from pydantic import TypeAdapter
 from typing import List
 
-from app.api.deps import DBSession, CurrentUser, CurrentAnilistToken
+from app.api.deps import DBSession, CurrentUser, CurrentAnilistToken, JobRepoDep
+from app.core.etag import conditional, content_digest, make_etag
 from app.schemas import anilist as anilist_schema
+from app.schemas import job as job_schema
 from app.schemas import msg as msg_schema
 from app.services.anilist_service import anilist_service
+from app.services.job_queue import job_queue
+from app.services.progress_writer import progress_writer
 from app.services.torrent_orchestration_service import torrent_orchestration_service
 
 router = APIRouter()
 
+_WATCHLIST_ADAPTER = TypeAdapter(List[anilist_schema.AnilistEntry])
+# timeUntilAiring is derived from airingAt and the clock, so it differs on every
+# Anilist refetch; leaving it out keeps the ETag stable while the list is unchanged.
+_ETAG_EXCLUDE = {"__all__": {"media": {"nextAiringEpisode": {"timeUntilAiring"}}}}
 
-@router.get("/", response_model=List[anilist_schema.AnilistEntry])
+
+def _watchlist_digest(watchlist: list[anilist_schema.AnilistEntry]) -> str:
+    return content_digest(
+        _WATCHLIST_ADAPTER.dump_json(watchlist, exclude=_ETAG_EXCLUDE)
+    )
+
+
+def _with_pending_progress(
+    entry: anilist_schema.AnilistEntry, pending: dict[int, int]
+) -> anilist_schema.AnilistEntry:
+    progress = pending.get(entry.media.id)
+    if progress is None:
+        return entry
+    # Copy rather than modify: the entry may be shared through the watchlist cache.
+    media = entry.media.model_copy(
+        update={
+            "mediaListEntry": anilist_schema.AnilistMediaListEntry(progress=progress)
+        }
+    )
+    return entry.model_copy(update={"media": media})
+
+
+@router.get(
+    "/",
+    response_model=List[anilist_schema.AnilistEntry],
+    response_class=ORJSONResponse,
+)
 async def get_user_watchlist(
+    request: Request,
+    response: Response,
     current_user: CurrentUser,
     anilist_token: CurrentAnilistToken,
 ):
     """
     Get the current user's 'CURRENT' watching list from Anilist.
+    Supports If-None-Match: a list whose content is unchanged is answered with 304
+    Not Modified, even after the cached copy was refetched from Anilist.
     """
     try:
         viewer_id = await anilist_service.get_viewer_id(anilist_token)
         watchlist = await anilist_service.get_user_list(
             user_token=anilist_token, user_id=viewer_id
         )
+        # Show progress that is still buffered for Anilist instead of the old value.
+        pending = progress_writer.pending_for(current_user.id)
+        if pending:
+            watchlist = [_with_pending_progress(entry, pending) for entry in watchlist]
+        etag = make_etag("w", viewer_id, _watchlist_digest(watchlist))
+        not_modified = conditional(request, response, etag, "watchlist")
+        if not_modified is not None:
+            return not_modified
         return watchlist
     except HTTPException as e:
         raise e
@@ -35,74 +83,134 @@ async def get_user_watchlist(
 
 
 @router.post(
-    "/download", response_model=msg_schema.Msg, status_code=status.HTTP_202_ACCEPTED
+    "/download",
+    response_model=job_schema.DownloadJob,
+    status_code=status.HTTP_202_ACCEPTED,
 )
 async def download_watchlist_item(
     request: anilist_schema.WatchlistDownloadRequest,
     current_user: CurrentUser,
     anilist_token: CurrentAnilistToken,
+    job_repo: JobRepoDep,
     db: DBSession,
 ):
     """
-    Trigger the download process for a specific unwatched episode from the watchlist.
+    Queue the download of a specific unwatched episode from the watchlist.
+    The Anilist lookup, Nyaa search and qBittorrent add run in a background job;
+    poll GET /api/v1/jobs/{id} for its status and torrent hash.
     """
-    print(f"Fetching details for Anilist media ID: {request.media_id}")
-    media_details = await anilist_service.get_media_details(
-        user_token=anilist_token, media_id=request.media_id
+    job = await job_repo.create_job(
+        user_id=current_user.id,
+        media_id=request.media_id,
+        episode=request.episode,
+        preferred_quality=request.preferred_quality,
     )
+    # Commit before waking the workers so they can see the job.
+    await db.commit()
+    job_queue.notify()
+    print(
+        f"Queued download job {job.id} for media ID {request.media_id}, episode {request.episode}"
+    )
+    return job
 
-    if not media_details:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail=f"Could not find media details on Anilist for ID {request.media_id}.",
-        )
 
-    media_title = media_details.title.userPreferred or media_details.title.romaji
-    if not media_title:
-        media_title = media_details.title.english or f"AnilistMedia_{request.media_id}"
-        print(
-            f"Warning: Using fallback title '{media_title}' for media ID {request.media_id}"
+@router.post(
+    "/download/batch", response_model=anilist_schema.WatchlistBatchDownloadResult
+)
+async def download_watchlist_batch(
+    request: anilist_schema.WatchlistBatchDownloadRequest,
+    current_user: CurrentUser,
+    anilist_token: CurrentAnilistToken,
+    db: DBSession,
+):
+    """
+    Download a range of episodes of one show (by default every aired episode after
+    the user's progress). A batch/season torrent covering the range is preferred;
+    otherwise one torrent per episode is picked. All of them are added to
+    qBittorrent in one call and linked in one insert.
+    """
+    viewer_id = await anilist_service.get_viewer_id(anilist_token)
+    watchlist = await anilist_service.get_user_list(
+        user_token=anilist_token, user_id=viewer_id
+    )
+    media = next((e.media for e in watchlist if e.media.id == request.media_id), None)
+    if media is None:
+        # Shared media details lack the user's progress and the next airing episode,
+        # so the default range cannot be worked out from them.
+        if request.first_episode is None or request.last_episode is None:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Media is not on your current watchlist; give first_episode and last_episode.",
+            )
+        media = await anilist_service.get_media_details(
+            user_token=anilist_token, media_id=request.media_id
         )
+        if not media:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Could not find media details on Anilist for ID {request.media_id}.",
+            )
 
-    print(f"Found title: '{media_title}' for media ID: {request.media_id}")
-
-    try:
-        torrent_hash = await torrent_orchestration_service.download_watchlist_episode(
-            db=db,
-            user=current_user,
-            media_title=media_title,
-            episode_number=request.episode,
-            preferred_quality=request.preferred_quality,
+    unwatched = media.get_unwatched_episodes()
+    first = request.first_episode or (unwatched[0] if unwatched else None)
+    last = request.last_episode or (unwatched[-1] if unwatched else None)
+    if first is None or last is None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="No unwatched aired episodes; give first_episode and last_episode.",
         )
-        return {
-            "msg": f"Download initiated for episode {request.episode}. Torrent hash: {torrent_hash}"
-        }
-    except HTTPException as e:
-        raise e
-    except Exception as e:
-        print(f"Error orchestrating download: {e}")
+    if first > last or last - first + 1 > anilist_schema.MAX_BATCH_EPISODES:
         raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Failed to initiate download.",
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"Episode range must be ascending and at most {anilist_schema.MAX_BATCH_EPISODES} episodes.",
         )
 
+    media_title = (
+        media.title.userPreferred
+        or media.title.romaji
+        or media.title.english
+        or f"AnilistMedia_{media.id}"
+    )
+    picks, missing = await torrent_orchestration_service.find_episode_range_torrents(
+        media_title, list(range(first, last + 1)), request.preferred_quality
+    )
+    if not picks:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"No torrents found on Nyaa for episodes {first}-{last} of '{media_title}'.",
+        )
 
-@router.post("/progress", response_model=msg_schema.Msg)
+    hashes = await torrent_orchestration_service.add_and_link_many(
+        db, current_user.id, [torrent for torrent, _ in picks]
+    )
+    return {
+        "media_id": media.id,
+        "torrents": [
+            {"hash": info_hash, "title": torrent.title, "episodes": episodes}
+            for info_hash, (torrent, episodes) in zip(hashes, picks)
+        ],
+        "missing_episodes": missing,
+    }
+
+
+@router.post(
+    "/progress", response_model=msg_schema.Msg, status_code=status.HTTP_202_ACCEPTED
+)
 async def update_watchlist_progress(
-    request: anilist_schema.WatchlistProgressUpdate, anilist_token: CurrentAnilistToken
+    request: anilist_schema.WatchlistProgressUpdate,
+    current_user: CurrentUser,
+    anilist_token: CurrentAnilistToken,
 ):
     """
     Update the progress for a media item on the user's Anilist watchlist.
+    Rapid updates of the same item are merged and only the last value is sent.
     """
-    success = await anilist_service.set_progress(
-        user_token=anilist_token, media_id=request.media_id, progress=request.progress
+    progress_writer.submit(
+        user_id=current_user.id,
+        user_token=anilist_token,
+        media_id=request.media_id,
+        progress=request.progress,
     )
-    if success:
-        return {
-            "msg": f"Anilist progress updated successfully for media ID {request.media_id} to {request.progress}."
-        }
-    else:
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Failed to update Anilist progress.",
-        )
+    return {
+        "msg": f"Anilist progress update for media ID {request.media_id} to {request.progress} accepted."
+    }
@@ -0,0 +1,41 @@
+from dataclasses import dataclass
+from typing import Optional
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.db.base import AsyncSession, run_after_commit
+from app.schemas import user as user_schema
+
+
+@dataclass(frozen=True)
+class AuthState:
+    """What authenticated requests need to know about a user, without the DB."""
+
+    user: user_schema.User
+    anilist_token: Optional[str]
+
+
+# Keyed by user ID. Hits and misses are exported as
+# uuutorrent_cache_lookups_total{cache="auth"}.
+auth_cache: TTLCache[AuthState] = TTLCache(
+    "auth",
+    max_entries=settings.AUTH_CACHE_MAX_ENTRIES,
+    ttl=settings.AUTH_CACHE_TTL,
+)
+
+
+def invalidate_user(user_id: int) -> None:
+    """
+    Drops a user's cached auth state, e.g. after their token was linked or they were
+    deactivated. Other processes notice within AUTH_CACHE_TTL seconds.
+    """
+    auth_cache.invalidate(user_id)
+
+
+def invalidate_user_on_commit(db: AsyncSession, user_id: int) -> None:
+    """
+    Drops a user's cached auth state now and again once `db` commits, so a request
+    that reloads the old row before the commit cannot cache it for AUTH_CACHE_TTL.
+    """
+    invalidate_user(user_id)
+    run_after_commit(db, lambda: invalidate_user(user_id))
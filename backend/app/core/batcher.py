@@ -0,0 +1,85 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Generic, Hashable, Optional, TypeVar
+
+from prometheus_client import Histogram
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+BATCH_SIZE = Histogram(
+    "uuutorrent_batch_size",
+    "Number of keys loaded per upstream request by request batchers.",
+    ["batcher"],
+    buckets=(1, 2, 5, 10, 20, 50, 100),
+)
+
+
+class Batcher(Generic[K, V]):
+    """
+    Merges lookups of different keys made within a short window into one call of
+    `fetch(keys, context)`, which returns a {key: value} mapping; keys missing from
+    it resolve to None. A batch is sent after `window` seconds or as soon as it
+    holds `max_size` keys. `context` (e.g. an auth token) is taken from the first
+    lookup of each batch. An exception from `fetch` is raised to every caller.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        fetch: Callable[[list[K], Any], Awaitable[dict[K, V]]],
+        window: float,
+        max_size: int,
+    ):
+        self.name = name
+        self._fetch = fetch
+        self.window = window
+        self.max_size = max_size
+        self._pending: dict[K, asyncio.Future] = {}
+        self._context: Any = None
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._running: set[asyncio.Task] = set()
+        self._sizes = BATCH_SIZE.labels(batcher=name)
+
+    async def load(self, key: K, context: Any = None) -> Optional[V]:
+        future = self._pending.get(key)
+        if future is None:
+            loop = asyncio.get_running_loop()
+            if not self._pending:
+                self._context = context
+                self._timer = loop.call_later(self.window, self._flush)
+            future = loop.create_future()
+            # Mark the exception as retrieved in case every caller was cancelled.
+            future.add_done_callback(lambda f: f.cancelled() or f.exception())
+            self._pending[key] = future
+            if len(self._pending) >= self.max_size:
+                self._flush()
+        # Shielded so a cancelled caller does not cancel the result for the others.
+        return await asyncio.shield(future)
+
+    def _flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, {}
+        context, self._context = self._context, None
+        if batch:
+            task = asyncio.create_task(self._run(batch, context))
+            self._running.add(task)
+            task.add_done_callback(self._running.discard)
+
+    async def _run(self, batch: dict[K, asyncio.Future], context: Any) -> None:
+        self._sizes.observe(len(batch))
+        try:
+            results = await self._fetch(list(batch), context)
+        except asyncio.CancelledError:
+            for future in batch.values():
+                future.cancel()
+            raise
+        except Exception as e:
+            for future in batch.values():
+                if not future.done():
+                    future.set_exception(e)
+        else:
+            for key, future in batch.items():
+                if not future.done():
+                    future.set_result(results.get(key))
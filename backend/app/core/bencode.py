@@ -0,0 +1,84 @@
+import hashlib
+
+
+class BencodeError(ValueError):
+    pass
+
+
+def _decode(data: bytes, index: int, spans: dict | None = None) -> tuple[object, int]:
+    """
+    Decodes the bencoded value starting at `index`. Returns (value, next_index).
+    If `spans` is given, the byte range of each top-level dict value is recorded in it
+    (keyed by the dict key), which is what info hash calculation needs.
+    """
+    try:
+        token = data[index : index + 1]
+        if token == b"i":
+            end = data.index(b"e", index)
+            return int(data[index + 1 : end]), end + 1
+        if token == b"l":
+            index += 1
+            items = []
+            while data[index : index + 1] != b"e":
+                item, index = _decode(data, index)
+                items.append(item)
+            return items, index + 1
+        if token == b"d":
+            index += 1
+            result = {}
+            while data[index : index + 1] != b"e":
+                key, index = _decode(data, index)
+                if not isinstance(key, bytes):
+                    raise BencodeError("Dictionary keys must be byte strings.")
+                start = index
+                result[key], index = _decode(data, index)
+                if spans is not None:
+                    spans[key] = (start, index)
+            return result, index + 1
+        if token.isdigit():
+            colon = data.index(b":", index)
+            length = int(data[index:colon])
+            start = colon + 1
+            if start + length > len(data):
+                raise BencodeError("String length exceeds input.")
+            return data[start : start + length], start + length
+    except (ValueError, IndexError) as e:
+        if isinstance(e, BencodeError):
+            raise
+        raise BencodeError(f"Malformed bencode at offset {index}: {e}")
+    raise BencodeError(f"Unexpected token {token!r} at offset {index}.")
+
+
+def _decode_document(data: bytes, spans: dict | None = None) -> object:
+    try:
+        value, end = _decode(data, 0, spans)
+    except RecursionError:
+        # Hostile or corrupt input nested deeper than Python's recursion limit.
+        raise BencodeError("Bencoded data is nested too deeply.")
+    if end != len(data):
+        raise BencodeError("Trailing data after bencoded value.")
+    return value
+
+
+def bdecode(data: bytes) -> object:
+    """Decodes a complete bencoded document."""
+    return _decode_document(data)
+
+
+def torrent_info_hash(torrent_bytes: bytes) -> str:
+    """
+    Computes the info hash qBittorrent uses to identify a .torrent file: the SHA-1 of
+    the raw bencoded 'info' dict (v1 and hybrid torrents), or the SHA-256 truncated to
+    40 hex chars for pure v2 torrents.
+    """
+    spans: dict = {}
+    metainfo = _decode_document(torrent_bytes, spans)
+    if not isinstance(metainfo, dict) or not isinstance(metainfo.get(b"info"), dict):
+        raise BencodeError("Not a torrent file: missing 'info' dictionary.")
+
+    start, stop = spans[b"info"]
+    info_bytes = torrent_bytes[start:stop]
+    info = metainfo[b"info"]
+    if b"pieces" not in info and info.get(b"meta version") == 2:
+        return hashlib.sha256(info_bytes).hexdigest()[:40]
+    return hashlib.sha1(info_bytes).hexdigest()
@@ -0,0 +1,160 @@
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Awaitable, Callable, Generic, Hashable, Optional, TypeVar
+
+from prometheus_client import Counter, Gauge
+
+V = TypeVar("V")
+
+CACHE_LOOKUPS = Counter(
+    "uuutorrent_cache_lookups_total",
+    "In-process cache lookups by result (hit, stale, miss).",
+    ["cache", "result"],
+)
+CACHE_EVICTIONS = Counter(
+    "uuutorrent_cache_evictions_total",
+    "Entries evicted from in-process caches to stay within max_entries.",
+    ["cache"],
+)
+CACHE_ENTRIES = Gauge(
+    "uuutorrent_cache_entries",
+    "Current number of entries in in-process caches.",
+    ["cache"],
+)
+
+
+class _Entry(Generic[V]):
+    __slots__ = ("value", "fresh_until", "stale_until")
+
+    def __init__(self, value: V, fresh_until: float, stale_until: float):
+        self.value = value
+        self.fresh_until = fresh_until
+        self.stale_until = stale_until
+
+
+class TTLCache(Generic[V]):
+    """
+    Size-bounded LRU cache with per-entry expiry and stale-while-revalidate.
+
+    An entry is fresh for `ttl` seconds. For a further `stale_ttl` seconds it is still
+    served, but the first lookup in that window starts one background refresh.
+    Falsy values (e.g. empty search results) are cached for `negative_ttl` seconds
+    instead, with no stale window, so "not found yet" is re-checked quickly.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        max_entries: int,
+        ttl: float,
+        stale_ttl: float = 0.0,
+        negative_ttl: Optional[float] = None,
+    ):
+        self.name = name
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.negative_ttl = ttl if negative_ttl is None else negative_ttl
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[Hashable, _Entry[V]] = OrderedDict()
+        self._refreshing: dict[Hashable, asyncio.Task] = {}
+        # Bumped by invalidate()/clear(); a fetch that started before an invalidation
+        # may have read outdated data, so its result is returned but not stored.
+        self._epoch = 0
+        self._lookups = {
+            result: CACHE_LOOKUPS.labels(cache=name, result=result)
+            for result in ("hit", "stale", "miss")
+        }
+        self._evictions = CACHE_EVICTIONS.labels(cache=name)
+        self._size = CACHE_ENTRIES.labels(cache=name)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _lookup(self, key: Hashable) -> tuple[Optional[_Entry[V]], str]:
+        """Returns (entry, result) where result is 'hit', 'stale' or 'miss'."""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None, "miss"
+        now = time.monotonic()
+        if now < entry.fresh_until:
+            self._entries.move_to_end(key)
+            return entry, "hit"
+        if now < entry.stale_until:
+            self._entries.move_to_end(key)
+            return entry, "stale"
+        del self._entries[key]
+        self._size.set(len(self._entries))
+        return None, "miss"
+
+    def _record(self, result: str) -> None:
+        if result == "hit":
+            self.hits += 1
+        elif result == "stale":
+            self.stale_hits += 1
+        else:
+            self.misses += 1
+        self._lookups[result].inc()
+
+    def get(self, key: Hashable) -> Optional[V]:
+        """Returns the cached value if it is fresh or stale, else None. No refresh."""
+        entry, result = self._lookup(key)
+        self._record(result)
+        return entry.value if entry is not None else None
+
+    def set(self, key: Hashable, value: V) -> None:
+        now = time.monotonic()
+        if value:
+            entry = _Entry(value, now + self.ttl, now + self.ttl + self.stale_ttl)
+        else:
+            entry = _Entry(value, now + self.negative_ttl, now + self.negative_ttl)
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self._evictions.inc()
+        self._size.set(len(self._entries))
+
+    def invalidate(self, key: Hashable) -> None:
+        self._epoch += 1
+        if self._entries.pop(key, None) is not None:
+            self._size.set(len(self._entries))
+
+    def clear(self) -> None:
+        self._epoch += 1
+        self._entries.clear()
+        self._size.set(0)
+
+    async def get_or_fetch(self, key: Hashable, fetch: Callable[[], Awaitable[V]]) -> V:
+        """
+        Returns the cached value for `key`, calling `fetch` on a miss. Stale entries
+        are returned immediately while `fetch` runs in the background. Exceptions
+        from a foreground fetch propagate; nothing is cached in that case.
+        """
+        entry, result = self._lookup(key)
+        self._record(result)
+        if entry is not None:
+            if result == "stale" and key not in self._refreshing:
+                task = asyncio.create_task(self._refresh(key, fetch))
+                self._refreshing[key] = task
+            return entry.value
+
+        epoch = self._epoch
+        value = await fetch()
+        if epoch == self._epoch:
+            self.set(key, value)
+        return value
+
+    async def _refresh(self, key: Hashable, fetch: Callable[[], Awaitable[V]]):
+        try:
+            epoch = self._epoch
+            value = await fetch()
+            if epoch == self._epoch:
+                self.set(key, value)
+        except Exception as e:
+            print(f"cache[{self.name}]: Background refresh of {key!r} failed: {e}")
+        finally:
+            self._refreshing.pop(key, None)
@@ -4,15 +4,79 @@ from functools import lru_cache
 
 class Settings(BaseSettings):
     DATABASE_URL: str
+    DB_POOL_SIZE: int = 10  # connections kept open per process
+    DB_MAX_OVERFLOW: int = 20  # extra connections opened under load, closed when idle
+    DB_POOL_TIMEOUT: float = 30.0  # seconds to wait for a free connection
+    DB_POOL_RECYCLE: int = 1800  # seconds before a connection is replaced; -1 = never
+    DB_POOL_PRE_PING: bool = False  # check connections on checkout (one extra query)
+    DB_STATEMENT_CACHE_SIZE: int = 100  # prepared statements cached per connection
+    DB_PGBOUNCER_MODE: bool = False  # disable statement caches for PgBouncer pooling
     SECRET_KEY: str
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
+    AUTH_CACHE_TTL: float = 30.0  # seconds a user's auth state is reused
+    AUTH_CACHE_MAX_ENTRIES: int = 10000
+    BCRYPT_ROUNDS: int = 12  # changing it rehashes passwords on next login
+    PASSWORD_HASH_WORKERS: int | None = None  # threads for bcrypt; default: CPU count
+    PASSWORD_HASH_MAX_PENDING: int = 256  # queued hash calls before callers wait
 
     QBITTORRENT_HOST: str
     QBITTORRENT_USER: str | None = None
     QBITTORRENT_PASS: str | None = None
+    QBITTORRENT_SYNC_INTERVAL: float = 2.0  # seconds between sync/maindata polls
+    QBITTORRENT_SYNC_MAX_STALENESS: float = 10.0  # max cache age before inline refresh
 
     NYAA_RSS_URL: str = "https://nyaa.si/?page=rss"
+    NYAA_CACHE_TTL: float = 120.0  # seconds a search result is fresh
+    NYAA_CACHE_STALE_TTL: float = 600.0  # extra seconds served stale while refreshing
+    NYAA_CACHE_EMPTY_TTL: float = 30.0  # seconds an empty result is cached
+    NYAA_CACHE_MAX_ENTRIES: int = 512
+
+    ANILIST_VIEWER_CACHE_TTL: float = 86400.0  # viewer ID per token; fixed per token
+    ANILIST_WATCHLIST_CACHE_TTL: float = 60.0  # seconds a user's watchlist is reused
+    ANILIST_CACHE_MAX_ENTRIES: int = 1024
+    ANILIST_RATE_LIMIT_PER_MINUTE: int = 90  # Anilist's documented per-client limit
+    ANILIST_RATE_LIMIT_BURST: int = 10
+    ANILIST_MAX_RETRIES: int = 2  # retries of a request that got HTTP 429
+    ANILIST_QUEUE_TIMEOUT: float = 30.0  # max seconds a request waits for a slot
+    ANILIST_BATCH_WINDOW: float = 0.02  # seconds to collect media lookups per batch
+    ANILIST_BATCH_MAX_SIZE: int = 50  # Anilist's maximum page size
+    ANILIST_MEDIA_CACHE_TTL: float = 86400.0  # shared media metadata (titles etc.)
+    ANILIST_MEDIA_CACHE_MAX_ENTRIES: int = 4096
+    ANILIST_MEDIA_PERSIST: bool = False  # also keep media metadata in Postgres
+    ANILIST_PROGRESS_DEBOUNCE: float = 1.5  # seconds of quiet before a progress write
+    ANILIST_PROGRESS_MAX_DELAY: float = 10.0  # max seconds a progress write is held
+
+    # Torrent selection (see app/services/torrent_ranking.py for weight names)
+    TORRENT_RANKING_WEIGHTS: dict[str, float] = {}
+    TORRENT_PREFERRED_GROUPS: list[str] = []
+    TORRENT_PREFERRED_CODEC: str | None = None  # e.g. "hevc", "avc", "av1"
+
+    # Background download jobs (see app/services/job_queue.py)
+    JOB_WORKERS: int = 4
+    JOB_MAX_ATTEMPTS: int = 5
+    JOB_RETRY_BASE_DELAY: float = 15.0  # seconds, doubled per attempt (with jitter)
+    JOB_RETRY_MAX_DELAY: float = 900.0
+    JOB_LEASE_SECONDS: float = 300.0  # a running job is reclaimed after this long
+    JOB_POLL_INTERVAL: float = 5.0  # seconds idle workers wait between table checks
+    JOB_ANILIST_CONCURRENCY: int = 2  # concurrent job calls per upstream
+    JOB_NYAA_CONCURRENCY: int = 2
+    JOB_QBITTORRENT_CONCURRENCY: int = 4
+
+    # Airing scheduler (see app/services/airing_scheduler.py); run on one instance only
+    AIRING_SCHEDULER_ENABLED: bool = False
+    AIRING_REFRESH_INTERVAL: float = 3600.0  # seconds between watchlist rescans
+    AIRING_SEARCH_DELAY: float = 900.0  # seconds after airing before the first search
+    AIRING_RETRY_INTERVAL: float = 900.0  # seconds between searches until it shows up
+    AIRING_GIVE_UP_AFTER: float = 86400.0  # stop searching this long after airing
+    AIRING_PREFERRED_QUALITY: str = "1080p"
+    AIRING_CONCURRENCY: int = 2  # episodes searched/added at the same time
+
+    # Shared upstream HTTP clients (Nyaa, Anilist, qBittorrent)
+    HTTP_MAX_CONNECTIONS: int = 100
+    HTTP_MAX_KEEPALIVE_CONNECTIONS: int = 20
+    HTTP_KEEPALIVE_EXPIRY: float = 30.0  # seconds an idle connection is kept open
+    HTTP2_ENABLED: bool = True
 
     class Config:
         env_file = ".env"
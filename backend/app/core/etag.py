@@ -0,0 +1,58 @@
+import hashlib
+import secrets
+from typing import Iterable, Optional
+
+from fastapi import Request, Response, status
+from prometheus_client import Counter
+
+CONDITIONAL_GETS = Counter(
+    "uuutorrent_conditional_gets_total",
+    "Listing requests answered with 304 Not Modified or a full response.",
+    ["endpoint", "result"],
+)
+
+# Version counters restart with the process; the boot token keeps ETags from a
+# previous run (or another instance) from matching by accident.
+_BOOT = secrets.token_hex(4)
+
+
+def digest(values: Iterable[str]) -> str:
+    """Short order-independent fingerprint of a set of strings (e.g. linked hashes)."""
+    return hashlib.blake2b("|".join(sorted(values)).encode(), digest_size=8).hexdigest()
+
+
+def content_digest(body: bytes) -> str:
+    """Short fingerprint of a serialized payload, for ETags of data without versions."""
+    return hashlib.blake2b(body, digest_size=8).hexdigest()
+
+
+def make_etag(*parts: object) -> str:
+    """Weak ETag built from version counters or digests (see content_digest)."""
+    return 'W/"' + "-".join([_BOOT, *(str(p) for p in parts)]) + '"'
+
+
+def is_not_modified(request: Request, etag: str) -> bool:
+    """True if the request's If-None-Match matches `etag` (weak comparison)."""
+    header: Optional[str] = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(tag.strip().removeprefix("W/") == opaque for tag in header.split(","))
+
+
+def conditional(
+    request: Request, response: Response, etag: str, endpoint: str
+) -> Optional[Response]:
+    """
+    Returns a 304 response if the client already has this version, otherwise sets
+    the ETag on `response` and returns None so the endpoint builds the body.
+    """
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if is_not_modified(request, etag):
+        CONDITIONAL_GETS.labels(endpoint=endpoint, result="not_modified").inc()
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    CONDITIONAL_GETS.labels(endpoint=endpoint, result="full").inc()
+    response.headers.update(headers)
+    return None
@@ -0,0 +1,46 @@
+import httpx
+from prometheus_client import Counter
+
+from app.core.config import settings
+
+UPSTREAM_REQUESTS = Counter(
+    "uuutorrent_upstream_requests_total",
+    "Requests sent to upstream services through the shared HTTP clients.",
+    ["upstream"],
+)
+UPSTREAM_CONNECTIONS = Counter(
+    "uuutorrent_upstream_connections_opened_total",
+    "New TCP connections opened to upstream services. "
+    "Requests minus connections is the number of requests served on a reused connection.",
+    ["upstream"],
+)
+
+
+def create_http_client(upstream: str, **kwargs) -> httpx.AsyncClient:
+    """
+    Creates a long-lived, pooled AsyncClient for one upstream service, using the pool
+    limits from settings. Requests and newly opened connections are counted per
+    upstream so connection reuse is visible in /api/metrics.
+    """
+    requests_counter = UPSTREAM_REQUESTS.labels(upstream=upstream)
+    connections_counter = UPSTREAM_CONNECTIONS.labels(upstream=upstream)
+
+    async def trace(event_name: str, info: dict):
+        if event_name == "connection.connect_tcp.complete":
+            connections_counter.inc()
+
+    async def on_request(request: httpx.Request):
+        requests_counter.inc()
+        request.extensions["trace"] = trace
+
+    limits = httpx.Limits(
+        max_connections=settings.HTTP_MAX_CONNECTIONS,
+        max_keepalive_connections=settings.HTTP_MAX_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry=settings.HTTP_KEEPALIVE_EXPIRY,
+    )
+    return httpx.AsyncClient(
+        http2=settings.HTTP2_ENABLED,
+        limits=limits,
+        event_hooks={"request": [on_request]},
+        **kwargs,
+    )
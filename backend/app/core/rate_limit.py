@@ -0,0 +1,88 @@
+import asyncio
+import time
+from typing import Optional
+
+from prometheus_client import Counter
+
+RATE_LIMIT_WAIT_SECONDS = Counter(
+    "uuutorrent_rate_limit_wait_seconds_total",
+    "Time requests spent queued by client-side rate limiters.",
+    ["limiter"],
+)
+RATE_LIMITED = Counter(
+    "uuutorrent_rate_limited_total",
+    "Responses where an upstream reported its rate limit was exceeded (HTTP 429).",
+    ["limiter"],
+)
+
+
+class RateLimitTimeout(Exception):
+    """Raised when a request waited longer than allowed for a rate limit slot."""
+
+
+class TokenBucket:
+    """
+    Client-side token bucket: `rate` requests per second with bursts of up to
+    `capacity`. Waiters are served in FIFO order.
+
+    The bucket can be corrected from the upstream's own view: observe() caps the
+    tokens at the reported remaining quota, and block_for() stops all requests for
+    a Retry-After period.
+    """
+
+    def __init__(self, name: str, rate: float, capacity: int):
+        self.name = name
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+        self._blocked_until = 0.0
+        self._lock = asyncio.Lock()  # FIFO queue of waiting requests
+        self._waited = RATE_LIMIT_WAIT_SECONDS.labels(limiter=name)
+        self._limited = RATE_LIMITED.labels(limiter=name)
+
+    def _refill(self, now: float) -> None:
+        self._tokens = min(
+            self.capacity, self._tokens + (now - self._updated) * self.rate
+        )
+        self._updated = now
+
+    async def acquire(self, timeout: Optional[float] = None) -> None:
+        """Waits for a slot. Raises RateLimitTimeout after `timeout` seconds."""
+        start = time.monotonic()
+        try:
+            await asyncio.wait_for(self._acquire(), timeout)
+        except asyncio.TimeoutError:
+            raise RateLimitTimeout(
+                f"{self.name}: no rate limit slot within {timeout:.0f}s"
+            )
+        finally:
+            self._waited.inc(time.monotonic() - start)
+
+    async def _acquire(self) -> None:
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._refill(now)
+                wait = self._blocked_until - now
+                if wait <= 0:
+                    if self._tokens >= 1:
+                        self._tokens -= 1
+                        return
+                    wait = (1 - self._tokens) / self.rate
+                await asyncio.sleep(wait)
+
+    def observe(self, remaining: Optional[int]) -> None:
+        """Caps the available tokens at the upstream's reported remaining quota."""
+        if remaining is None:
+            return
+        self._refill(time.monotonic())
+        self._tokens = min(self._tokens, float(remaining))
+
+    def block_for(self, seconds: float) -> None:
+        """Holds back every request for `seconds` (e.g. after a 429 Retry-After)."""
+        self._limited.inc()
+        now = time.monotonic()
+        self._refill(now)
+        self._tokens = 0.0
+        self._blocked_until = max(self._blocked_until, now + seconds)
@@ -1,11 +1,42 @@
+import asyncio
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta, timezone
+from typing import Callable, Optional, TypeVar
 from passlib.context import CryptContext
 from jose import JWTError, jwt
+from prometheus_client import Gauge, Histogram
 
 from app.core.config import settings
 from app.schemas.token import TokenData
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+T = TypeVar("T")
+
+# Hashes with a different cost factor are flagged by verify_and_update and
+# rehashed on the user's next login.
+pwd_context = CryptContext(
+    schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=settings.BCRYPT_ROUNDS
+)
+
+PASSWORD_HASH_PENDING = Gauge(
+    "uuutorrent_password_hash_pending",
+    "Password hash/verify calls queued or running in the hashing pool; anything above "
+    "the pool size is waiting.",
+)
+PASSWORD_HASH_SECONDS = Histogram(
+    "uuutorrent_password_hash_seconds",
+    "Time from submitting a password hash/verify call until it finished.",
+    ["operation"],
+)
+
+# bcrypt releases the GIL while hashing, so a thread pool uses every core without
+# blocking the event loop.
+_hash_pool = ThreadPoolExecutor(
+    max_workers=settings.PASSWORD_HASH_WORKERS or os.cpu_count() or 1,
+    thread_name_prefix="password-hash",
+)
+_hash_slots: Optional[asyncio.Semaphore] = None
 
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
@@ -16,6 +47,42 @@ def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
 
 
+async def _run_in_hash_pool(operation: str, fn: Callable[..., T], *args) -> T:
+    global _hash_slots
+    if _hash_slots is None:
+        _hash_slots = asyncio.Semaphore(settings.PASSWORD_HASH_MAX_PENDING)
+    start = time.perf_counter()
+    PASSWORD_HASH_PENDING.inc()
+    try:
+        # Beyond PASSWORD_HASH_MAX_PENDING, callers wait here instead of piling
+        # up unbounded work in the pool's queue.
+        async with _hash_slots:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(_hash_pool, fn, *args)
+    finally:
+        PASSWORD_HASH_PENDING.dec()
+        PASSWORD_HASH_SECONDS.labels(operation=operation).observe(
+            time.perf_counter() - start
+        )
+
+
+async def hash_password(password: str) -> str:
+    """Hashes a password off the event loop."""
+    return await _run_in_hash_pool("hash", pwd_context.hash, password)
+
+
+async def verify_and_update_password(
+    plain_password: str, hashed_password: str
+) -> tuple[bool, Optional[str]]:
+    """
+    Verifies a password off the event loop. Returns (valid, new_hash); new_hash is
+    set when the stored hash should be replaced (e.g. BCRYPT_ROUNDS changed).
+    """
+    return await _run_in_hash_pool(
+        "verify", pwd_context.verify_and_update, plain_password, hashed_password
+    )
+
+
 def create_access_token(data: dict, expires_delta: timedelta | None = None) -> str:
     to_encode = data.copy()
     if expires_delta:
@@ -0,0 +1,47 @@
+import asyncio
+from typing import Awaitable, Callable, Generic, Hashable, TypeVar
+
+from prometheus_client import Counter
+
+T = TypeVar("T")
+
+SINGLEFLIGHT_CALLS = Counter(
+    "uuutorrent_singleflight_calls_total",
+    "Calls through single-flight groups; 'coalesced' calls joined an in-flight request.",
+    ["group", "result"],
+)
+
+
+class SingleFlight(Generic[T]):
+    """
+    Coalesces concurrent calls that share a key: the first caller starts the call,
+    later callers with the same key await the same result (or exception) instead of
+    issuing a duplicate upstream request. Nothing is cached once the call finishes.
+
+    The call runs in its own task, so a caller that is cancelled (e.g. the client
+    disconnected) does not cancel it for the others.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._calls: dict[Hashable, asyncio.Task] = {}
+        self._leader = SINGLEFLIGHT_CALLS.labels(group=name, result="leader")
+        self._coalesced = SINGLEFLIGHT_CALLS.labels(group=name, result="coalesced")
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> T:
+        task = self._calls.get(key)
+        if task is None:
+            self._leader.inc()
+            task = asyncio.ensure_future(fn())
+            self._calls[key] = task
+            task.add_done_callback(lambda t: self._finish(key, t))
+        else:
+            self._coalesced.inc()
+        return await asyncio.shield(task)
+
+    def _finish(self, key: Hashable, task: asyncio.Task) -> None:
+        if self._calls.get(key) is task:
+            del self._calls[key]
+        if not task.cancelled():
+            # Mark the exception as retrieved in case every caller was cancelled.
+            task.exception()
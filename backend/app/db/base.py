@@ -1,12 +1,41 @@
+from sqlalchemy import event
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
-from sqlalchemy.orm import sessionmaker, DeclarativeBase
-from typing import AsyncGenerator
+from sqlalchemy.orm import Session, sessionmaker, DeclarativeBase
+from typing import AsyncGenerator, Callable
+from uuid import uuid4
 
 from app.core.config import settings
+from app.db.pool import InstrumentedAsyncPool, register_pool_metrics
+
+
+def _connect_args() -> dict:
+    if settings.DB_PGBOUNCER_MODE:
+        # PgBouncer in transaction/statement mode may hand each transaction a
+        # different server connection, so named prepared statements cannot be
+        # cached or reused; unique names avoid "already exists" collisions.
+        return {
+            "statement_cache_size": 0,
+            "prepared_statement_cache_size": 0,
+            "prepared_statement_name_func": lambda: f"__asyncpg_{uuid4()}__",
+        }
+    return {
+        "statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE,
+        "prepared_statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE,
+    }
+
 
 engine = create_async_engine(
-    settings.DATABASE_URL, echo=False
-)  # echo=True for debugging
+    settings.DATABASE_URL,
+    echo=False,  # echo=True for debugging
+    poolclass=InstrumentedAsyncPool,
+    pool_size=settings.DB_POOL_SIZE,
+    max_overflow=settings.DB_MAX_OVERFLOW,
+    pool_timeout=settings.DB_POOL_TIMEOUT,
+    pool_recycle=settings.DB_POOL_RECYCLE,
+    pool_pre_ping=settings.DB_POOL_PRE_PING,
+    connect_args=_connect_args(),
+)
+register_pool_metrics(engine.pool)
 
 AsyncSessionLocal = sessionmaker(
     bind=engine,
@@ -17,6 +46,29 @@ AsyncSessionLocal = sessionmaker(
 )
 
 
+def run_after_commit(db: AsyncSession, callback: Callable[[], None]) -> None:
+    """
+    Runs `callback` once the session's current transaction has committed (e.g. to
+    drop caches only when other readers can no longer load the old rows).
+    Dropped if the transaction rolls back.
+    """
+    db.sync_session.info.setdefault("after_commit", []).append(callback)
+
+
+@event.listens_for(Session, "after_commit")
+def _run_commit_callbacks(session: Session) -> None:
+    for callback in session.info.pop("after_commit", []):
+        try:
+            callback()
+        except Exception as e:
+            print(f"Error in after-commit callback: {e}")
+
+
+@event.listens_for(Session, "after_rollback")
+def _drop_commit_callbacks(session: Session) -> None:
+    session.info.pop("after_commit", None)
+
+
 class Base(DeclarativeBase):
     pass
 
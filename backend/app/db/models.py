@@ -6,7 +6,9 @@ from sqlalchemy import (
     Boolean,
     DateTime,
     UniqueConstraint,
+    Index,
 )
+from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 
@@ -65,3 +67,47 @@ class UserTorrentLink(Base):
     __table_args__ = (
         UniqueConstraint("user_id", "torrent_hash", name="_user_torrent_uc"),
     )
+
+
+class DownloadJob(Base):
+    __tablename__ = "download_jobs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(
+        Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True
+    )
+    media_id = Column(Integer, nullable=False)
+    episode = Column(Integer, nullable=False)
+    preferred_quality = Column(String, nullable=False)
+    # queued -> running -> succeeded | failed (running jobs go back to queued on retry)
+    status = Column(String, nullable=False, default="queued")
+    attempts = Column(Integer, nullable=False, default=0)
+    last_error = Column(String, nullable=True)
+    torrent_hash = Column(String, nullable=True)
+    # Earliest time a queued job may run; for a running job, when its lease expires.
+    run_after = Column(
+        DateTime(timezone=True), nullable=False, server_default=func.now()
+    )
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(
+        DateTime(timezone=True), onupdate=func.now(), default=func.now()
+    )
+
+    __table_args__ = (
+        Index("ix_download_jobs_status_run_after", "status", "run_after"),
+    )
+
+
+class AnilistMediaMetadata(Base):
+    """Shared (not user-specific) Anilist media fields, keyed by Anilist media ID."""
+
+    __tablename__ = "anilist_media"
+
+    id = Column(Integer, primary_key=True, autoincrement=False)
+    data = Column(JSONB, nullable=False)
+    updated_at = Column(
+        DateTime(timezone=True),
+        nullable=False,
+        server_default=func.now(),
+        onupdate=func.now(),
+    )
@@ -0,0 +1,48 @@
+import time
+
+from prometheus_client import Counter, Gauge, Histogram
+from sqlalchemy import exc
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+DB_POOL_WAIT_SECONDS = Histogram(
+    "uuutorrent_db_pool_wait_seconds",
+    "Time to check a connection out of the DB pool (including opening a new one).",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30),
+)
+DB_POOL_TIMEOUTS = Counter(
+    "uuutorrent_db_pool_timeouts_total",
+    "Checkouts that gave up after DB_POOL_TIMEOUT seconds (pool exhausted).",
+)
+DB_POOL_SIZE = Gauge("uuutorrent_db_pool_size", "Configured DB pool size.")
+DB_POOL_CHECKED_OUT = Gauge(
+    "uuutorrent_db_pool_checked_out", "DB connections currently in use."
+)
+DB_POOL_CHECKED_IN = Gauge(
+    "uuutorrent_db_pool_checked_in", "Idle DB connections in the pool."
+)
+DB_POOL_OVERFLOW = Gauge(
+    "uuutorrent_db_pool_overflow",
+    "Connections open beyond pool_size (negative: pool not yet filled).",
+)
+
+
+class InstrumentedAsyncPool(AsyncAdaptedQueuePool):
+    """AsyncAdaptedQueuePool that records checkout wait times and timeouts."""
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            DB_POOL_TIMEOUTS.inc()
+            raise
+        finally:
+            DB_POOL_WAIT_SECONDS.observe(time.perf_counter() - start)
+
+
+def register_pool_metrics(pool: AsyncAdaptedQueuePool) -> None:
+    """Exports the pool's live counters; read on every metrics scrape."""
+    DB_POOL_SIZE.set_function(pool.size)
+    DB_POOL_CHECKED_OUT.set_function(pool.checkedout)
+    DB_POOL_CHECKED_IN.set_function(pool.checkedin)
+    DB_POOL_OVERFLOW.set_function(pool.overflow)
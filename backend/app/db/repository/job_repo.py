@@ -0,0 +1,119 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+from sqlalchemy import update
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+from app.db.models import DownloadJob
+
+
+class JobRepository:
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def create_job(
+        self, user_id: int, media_id: int, episode: int, preferred_quality: str
+    ) -> DownloadJob:
+        job = DownloadJob(
+            user_id=user_id,
+            media_id=media_id,
+            episode=episode,
+            preferred_quality=preferred_quality,
+            status="queued",
+            attempts=0,
+        )
+        self.db.add(job)
+        await self.db.flush()
+        await self.db.refresh(job)
+        return job
+
+    async def get_job_for_user(
+        self, user_id: int, job_id: int
+    ) -> Optional[DownloadJob]:
+        """Fetches a job only if it belongs to the given user."""
+        result = await self.db.execute(
+            select(DownloadJob).filter_by(id=job_id, user_id=user_id)
+        )
+        return result.scalars().first()
+
+    async def claim_next(self, lease_seconds: float) -> Optional[DownloadJob]:
+        """
+        Claims the next due job: a queued job whose run_after has passed, or a running
+        job whose lease expired (its worker died). FOR UPDATE SKIP LOCKED lets several
+        workers and app instances claim concurrently without blocking on each other.
+        The claimed job is marked running with a fresh lease; commit to release the lock.
+        """
+        now = datetime.now(timezone.utc)
+        stmt = (
+            select(DownloadJob)
+            .where(
+                DownloadJob.run_after <= now,
+                DownloadJob.status.in_(("queued", "running")),
+            )
+            .order_by(DownloadJob.run_after)
+            .limit(1)
+            .with_for_update(skip_locked=True)
+        )
+        result = await self.db.execute(stmt)
+        job = result.scalars().first()
+        if job is None:
+            return None
+
+        job.status = "running"
+        job.attempts += 1
+        job.run_after = now + timedelta(seconds=lease_seconds)
+        await self.db.flush()
+        return job
+
+    async def _finish(self, job_id: int, attempts: int, **values) -> bool:
+        """
+        Updates a running job, but only if it is still on the same attempt; a job
+        whose lease expired and was re-claimed elsewhere is left to the new owner.
+        """
+        stmt = (
+            update(DownloadJob)
+            .where(
+                DownloadJob.id == job_id,
+                DownloadJob.attempts == attempts,
+                DownloadJob.status == "running",
+            )
+            .values(**values)
+            .execution_options(synchronize_session=False)
+        )
+        result = await self.db.execute(stmt)
+        return result.rowcount > 0
+
+    async def mark_succeeded(
+        self, job_id: int, attempts: int, torrent_hash: str
+    ) -> bool:
+        return await self._finish(
+            job_id,
+            attempts,
+            status="succeeded",
+            torrent_hash=torrent_hash,
+            last_error=None,
+        )
+
+    async def mark_failed(self, job_id: int, attempts: int, error: str) -> bool:
+        return await self._finish(job_id, attempts, status="failed", last_error=error)
+
+    async def schedule_retry(
+        self,
+        job_id: int,
+        attempts: int,
+        error: str,
+        delay: float,
+        refund_attempt: bool = False,
+    ) -> bool:
+        """
+        Puts a running job back in the queue to run after `delay` seconds.
+        With refund_attempt the attempt does not count (e.g. the worker was stopped).
+        """
+        return await self._finish(
+            job_id,
+            attempts,
+            status="queued",
+            last_error=error,
+            attempts=attempts - 1 if refund_attempt else attempts,
+            run_after=datetime.now(timezone.utc) + timedelta(seconds=delay),
+        )
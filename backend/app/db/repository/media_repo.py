@@ -0,0 +1,41 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.sql import func
+from datetime import datetime, timedelta, timezone
+from typing import List
+
+from app.db.models import AnilistMediaMetadata
+
+
+class MediaRepository:
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def get_fresh_media(
+        self, media_ids: List[int], max_age_seconds: float
+    ) -> dict[int, dict]:
+        """Returns stored media data updated within max_age_seconds, keyed by ID."""
+        if not media_ids:
+            return {}
+        cutoff = datetime.now(timezone.utc) - timedelta(seconds=max_age_seconds)
+        result = await self.db.execute(
+            select(AnilistMediaMetadata).where(
+                AnilistMediaMetadata.id.in_(media_ids),
+                AnilistMediaMetadata.updated_at >= cutoff,
+            )
+        )
+        return {row.id: row.data for row in result.scalars().all()}
+
+    async def upsert_media(self, media: List[dict]) -> None:
+        """Creates or refreshes stored media data in one statement."""
+        if not media:
+            return
+        # One row per ID; Postgres rejects duplicate keys within one upsert.
+        rows = {item["id"]: {"id": item["id"], "data": item} for item in media}
+        stmt = insert(AnilistMediaMetadata).values(list(rows.values()))
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["id"],
+            set_=dict(data=stmt.excluded.data, updated_at=func.now()),
+        )
+        await self.db.execute(stmt)
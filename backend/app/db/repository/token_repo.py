@@ -2,9 +2,10 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.exc import IntegrityError
-from typing import Optional
+from typing import List, Optional
 
-from app.db.models import AnilistToken
+from app.core.auth_cache import invalidate_user_on_commit
+from app.db.models import AnilistToken, User
 
 
 class AnilistTokenRepository:
@@ -18,6 +19,13 @@ class AnilistTokenRepository:
         )
         return result.scalars().first()
 
+    async def get_active_tokens(self) -> List[AnilistToken]:
+        """Fetches the Anilist tokens of every active user that linked an account."""
+        result = await self.db.execute(
+            select(AnilistToken).join(User).filter(User.is_active.is_(True))
+        )
+        return list(result.scalars().all())
+
     async def save_token(self, user_id: int, access_token: str) -> AnilistToken:
         """
         Saves (creates or updates) the Anilist access token for a user.
@@ -32,6 +40,7 @@ class AnilistTokenRepository:
         try:
             result = await self.db.execute(stmt)
             saved_token = result.scalars().one()
+            invalidate_user_on_commit(self.db, user_id)
             return saved_token
         except IntegrityError as e:
             print(f"Integrity error saving token for user {user_id}: {e}")
@@ -46,5 +55,6 @@ class AnilistTokenRepository:
         if token:
             await self.db.delete(token)
             await self.db.flush()
+            invalidate_user_on_commit(self.db, user_id)
             return True
         return False
@@ -1,8 +1,8 @@
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
-from sqlalchemy import delete
-from sqlalchemy.exc import IntegrityError
-from typing import List, Optional
+from sqlalchemy import delete, func
+from sqlalchemy.dialects.postgresql import insert
+from typing import List, Optional, Set
 
 from app.db.models import UserTorrentLink
 
@@ -16,27 +16,65 @@ class TorrentRepository:
     ) -> Optional[UserTorrentLink]:
         """
         Creates a link between a user and a torrent hash.
-        Handles potential unique constraint violations gracefully.
-        Returns the link object if created, None if it already existed or on error.
+        Uses PostgreSQL's ON CONFLICT DO NOTHING, so an existing link costs no extra
+        round trip and leaves the rest of the session's transaction untouched.
+        Returns the link object if created, None if it already existed.
         """
-        link = UserTorrentLink(user_id=user_id, torrent_hash=torrent_hash)
-        self.db.add(link)
+        stmt = (
+            insert(UserTorrentLink)
+            .values(user_id=user_id, torrent_hash=torrent_hash)
+            .on_conflict_do_nothing(index_elements=["user_id", "torrent_hash"])
+            .returning(UserTorrentLink)
+        )
         try:
-            await self.db.flush()
-            await self.db.refresh(link)
-            return link
-        except IntegrityError as e:
-            await self.db.rollback()
-            print(
-                f"IntegrityError linking torrent {torrent_hash} for user {user_id}: {e}. Link likely exists."
-            )
-            existing_link = await self.get_link(user_id, torrent_hash)
-            return existing_link
+            result = await self.db.execute(stmt)
+            return result.scalars().first()
         except Exception as e:
-            await self.db.rollback()
             print(f"Error linking torrent {torrent_hash} for user {user_id}: {e}")
             raise
 
+    async def link_torrents(self, user_id: int, torrent_hashes: List[str]) -> List[str]:
+        """
+        Links several torrent hashes to a user in one statement.
+        Returns the hashes that were newly linked (existing links are skipped).
+        """
+        if not torrent_hashes:
+            return []
+        rows = [
+            {"user_id": user_id, "torrent_hash": h}
+            for h in dict.fromkeys(torrent_hashes)
+        ]
+        stmt = (
+            insert(UserTorrentLink)
+            .values(rows)
+            .on_conflict_do_nothing(index_elements=["user_id", "torrent_hash"])
+            .returning(UserTorrentLink.torrent_hash)
+        )
+        result = await self.db.execute(stmt)
+        return list(result.scalars().all())
+
+    async def link_torrent_to_users(
+        self, user_ids: List[int], torrent_hash: str
+    ) -> List[int]:
+        """
+        Links one torrent hash to several users in one statement.
+        Returns the IDs of the users that were newly linked.
+        """
+        if not user_ids:
+            return []
+        rows = [
+            {"user_id": user_id, "torrent_hash": torrent_hash}
+            for user_id in dict.fromkeys(user_ids)
+        ]
+        stmt = (
+            insert(UserTorrentLink)
+            .values(rows)
+            .on_conflict_do_nothing(index_elements=["user_id", "torrent_hash"])
+            .returning(UserTorrentLink.user_id)
+        )
+        result = await self.db.execute(stmt)
+        return list(result.scalars().all())
+
     async def get_link(
         self, user_id: int, torrent_hash: str
     ) -> Optional[UserTorrentLink]:
@@ -66,6 +104,59 @@ class TorrentRepository:
         deleted_count = result.rowcount
         return deleted_count > 0
 
+    async def unlink_torrents(self, user_id: int, torrent_hashes: List[str]) -> int:
+        """
+        Removes the links between a user and several torrent hashes in one statement.
+        Returns the number of links deleted.
+        """
+        if not torrent_hashes:
+            return 0
+        stmt = (
+            delete(UserTorrentLink)
+            .where(
+                UserTorrentLink.user_id == user_id,
+                UserTorrentLink.torrent_hash.in_(torrent_hashes),
+            )
+            .execution_options(synchronize_session=False)
+        )
+
+        result = await self.db.execute(stmt)
+        return result.rowcount
+
+    async def lock_torrent_hashes(self, torrent_hashes: List[str]) -> None:
+        """
+        Takes transaction-scoped advisory locks on the given hashes, so adding and
+        releasing the same torrent from different requests is serialized. The locks
+        are released on commit or rollback. Hashes are locked in sorted order to
+        avoid deadlocks between batches.
+        """
+        for torrent_hash in sorted({h.lower() for h in torrent_hashes}):
+            await self.db.execute(
+                select(func.pg_advisory_xact_lock(func.hashtext(torrent_hash)))
+            )
+
+    async def release_torrents(
+        self, user_id: int, torrent_hashes: List[str]
+    ) -> List[str]:
+        """
+        Unlinks the user from the given torrents and returns the hashes that no user
+        links anymore, i.e. the torrents that may be removed from qBittorrent.
+        Holds the hashes' advisory locks until the transaction ends, so commit only
+        after the orphaned torrents were deleted.
+        """
+        if not torrent_hashes:
+            return []
+        await self.lock_torrent_hashes(torrent_hashes)
+        await self.unlink_torrents(user_id=user_id, torrent_hashes=torrent_hashes)
+        stmt = (
+            select(UserTorrentLink.torrent_hash)
+            .where(UserTorrentLink.torrent_hash.in_(torrent_hashes))
+            .distinct()
+        )
+        result = await self.db.execute(stmt)
+        still_linked = set(result.scalars().all())
+        return [h for h in torrent_hashes if h not in still_linked]
+
     async def get_user_torrent_hashes(self, user_id: int) -> List[str]:
         """Retrieves a list of all torrent hashes linked to a specific user."""
         stmt = select(UserTorrentLink.torrent_hash).where(
@@ -88,6 +179,19 @@ class TorrentRepository:
         result = await self.db.execute(stmt)
         return result.scalar_one_or_none() is not None
 
+    async def get_owned_hashes(
+        self, user_id: int, torrent_hashes: List[str]
+    ) -> Set[str]:
+        """Returns the subset of the given hashes that the user is linked to."""
+        if not torrent_hashes:
+            return set()
+        stmt = select(UserTorrentLink.torrent_hash).where(
+            UserTorrentLink.user_id == user_id,
+            UserTorrentLink.torrent_hash.in_(torrent_hashes),
+        )
+        result = await self.db.execute(stmt)
+        return set(result.scalars().all())
+
     async def get_all_links_for_user(self, user_id: int) -> List[UserTorrentLink]:
         """Gets all link objects for a user."""
         result = await self.db.execute(
@@ -1,8 +1,10 @@
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
+from sqlalchemy import update
 from typing import Optional
 
-from app.db.models import User
+from app.core.auth_cache import invalidate_user_on_commit
+from app.db.models import AnilistToken, User
 from app.schemas.user import UserCreate
 
 
@@ -14,6 +16,39 @@ class UserRepository:
         result = await self.db.execute(select(User).filter(User.id == user_id))
         return result.scalars().first()
 
+    async def get_user_with_anilist_token(
+        self, user_id: int
+    ) -> tuple[Optional[User], Optional[str]]:
+        """Fetches a user and their Anilist access token (if any) in one query."""
+        result = await self.db.execute(
+            select(User, AnilistToken.access_token)
+            .outerjoin(AnilistToken, AnilistToken.user_id == User.id)
+            .filter(User.id == user_id)
+        )
+        row = result.first()
+        if row is None:
+            return None, None
+        return row[0], row[1]
+
+    async def set_user_active(self, user_id: int, is_active: bool) -> bool:
+        """Activates or deactivates a user. Returns True if the user exists."""
+        result = await self.db.execute(
+            update(User)
+            .where(User.id == user_id)
+            .values(is_active=is_active)
+            .execution_options(synchronize_session=False)
+        )
+        invalidate_user_on_commit(self.db, user_id)
+        return result.rowcount > 0
+
+    async def update_password_hash(self, user_id: int, hashed_password: str) -> None:
+        await self.db.execute(
+            update(User)
+            .where(User.id == user_id)
+            .values(hashed_password=hashed_password)
+            .execution_options(synchronize_session=False)
+        )
+
     async def get_user_by_username(self, username: str) -> Optional[User]:
         result = await self.db.execute(select(User).filter(User.username == username))
         return result.scalars().first()
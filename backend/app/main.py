@@ -1,3 +1,4 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, Request, status
 from fastapi.responses import JSONResponse
 from fastapi.exceptions import RequestValidationError
@@ -6,7 +7,15 @@ from prometheus_fastapi_instrumentator import Instrumentator
 
 from app.api.api import api_router
 
+from app.core.config import settings
 from app.db.base import create_tables
+from app.services.airing_scheduler import airing_scheduler
+from app.services.anilist_service import anilist_service
+from app.services.job_queue import job_queue
+from app.services.nyaa_service import nyaa_service
+from app.services.progress_writer import progress_writer
+from app.services.qbittorrent_service import qbittorrent_service
+from app.services.torrent_state_cache import torrent_state_cache
 
 # Define CORS origins allowed (adjust for your TUI's environment)
 origins = [
@@ -18,6 +27,32 @@ origins = [
 ]
 
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    print("Creating database tables (if they don't exist)...")
+    await create_tables()
+    print("Database tables checked/created.")
+    # Shared, pooled upstream clients live for the lifetime of the app.
+    nyaa_service.start()
+    anilist_service.start()
+    await qbittorrent_service.start()
+    torrent_state_cache.start()
+    job_queue.start()
+    if settings.AIRING_SCHEDULER_ENABLED:
+        airing_scheduler.start()
+
+    yield
+
+    await airing_scheduler.stop()
+    await job_queue.stop()
+    # Send buffered Anilist progress before the Anilist client is closed.
+    await progress_writer.close()
+    await torrent_state_cache.stop()
+    await qbittorrent_service.close()
+    await anilist_service.close()
+    await nyaa_service.close()
+
+
 app = FastAPI(
     title="UUUTorrent Backend",
     description="API backend for managing torrents via qBittorrent, integrated with Anilist watchlist.",
@@ -25,6 +60,7 @@ app = FastAPI(
     openapi_url="/api/v1/openapi.json",  # Standard OpenAPI path
     docs_url="/api/docs",  # Swagger UI
     redoc_url="/api/redoc",  # ReDoc UI
+    lifespan=lifespan,
 )
 
 app.add_middleware(
@@ -50,13 +86,6 @@ async def health_check():
     return {"status": "ok"}
 
 
-@app.on_event("startup")
-async def on_startup():
-    print("Creating database tables (if they don't exist)...")
-    await create_tables()
-    print("Database tables checked/created.")
-
-
 # Custom exception handler for validation errors for cleaner responses
 @app.exception_handler(RequestValidationError)
 async def validation_exception_handler(request: Request, exc: RequestValidationError):
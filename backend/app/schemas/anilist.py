@@ -1,4 +1,4 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from typing import Optional
 
 
@@ -30,10 +30,17 @@ class AnilistMedia(BaseModel):
     nextAiringEpisode: Optional[AnilistNextAiringEpisode] = None
 
     def get_unwatched_episodes(self) -> list[int]:
-        if not self.episodes or self.episodes == 0 or self.status == "RELEASING":
+        """Aired episodes after the user's progress (up to the next airing one)."""
+        if self.status == "RELEASING":
+            if not self.nextAiringEpisode:
+                return []
+            last_aired = self.nextAiringEpisode.episode - 1
+        elif not self.episodes:
             return []
+        else:
+            last_aired = self.episodes
         current_progress = self.mediaListEntry.progress if self.mediaListEntry else 0
-        return list(range(current_progress + 1, self.episodes + 1))
+        return list(range(current_progress + 1, last_aired + 1))
 
 
 class AnilistEntry(BaseModel):
@@ -46,6 +53,28 @@ class WatchlistDownloadRequest(BaseModel):
     preferred_quality: str = "1080p"
 
 
+MAX_BATCH_EPISODES = 100
+
+
+class WatchlistBatchDownloadRequest(BaseModel):
+    media_id: int
+    first_episode: Optional[int] = Field(None, ge=1)  # default: first unwatched
+    last_episode: Optional[int] = Field(None, ge=1)  # default: last aired
+    preferred_quality: str = "1080p"
+
+
+class WatchlistBatchTorrent(BaseModel):
+    hash: str
+    title: str
+    episodes: list[int]
+
+
+class WatchlistBatchDownloadResult(BaseModel):
+    media_id: int
+    torrents: list[WatchlistBatchTorrent]
+    missing_episodes: list[int]  # no torrent found on Nyaa
+
+
 class WatchlistProgressUpdate(BaseModel):
     media_id: int
     progress: int
@@ -0,0 +1,21 @@
+from pydantic import BaseModel
+from typing import Literal, Optional
+import datetime
+
+JobStatus = Literal["queued", "running", "succeeded", "failed"]
+
+
+class DownloadJob(BaseModel):
+    id: int
+    media_id: int
+    episode: int
+    preferred_quality: str
+    status: JobStatus
+    attempts: int
+    last_error: Optional[str] = None
+    torrent_hash: Optional[str] = None  # set once the job has succeeded
+    created_at: datetime.datetime
+    updated_at: Optional[datetime.datetime] = None
+
+    class Config:
+        from_attributes = True
@@ -1,4 +1,16 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
+from typing import Literal
+
+MAX_BATCH_HASHES = 500
+MAX_PAGE_SIZE = 1000
+
+# Sortable fields, named as in qBittorrent's torrent data ('state' sorts by raw state).
+TorrentSortField = Literal[
+    "added_on", "name", "size", "progress", "state", "num_seeds", "num_leechs"
+]
+TorrentStateFilter = Literal[
+    "all", "downloading", "seeding", "completed", "paused", "stalled", "errored"
+]
 
 
 class TorrentInfo(BaseModel):
@@ -14,3 +26,16 @@ class TorrentInfo(BaseModel):
 
 class TorrentAdd(BaseModel):
     magnet_link: str
+
+
+class TorrentBatchRequest(BaseModel):
+    action: Literal["pause", "resume", "delete"]
+    hashes: list[str] = Field(..., min_length=1, max_length=MAX_BATCH_HASHES)
+    delete_files: bool = False  # only used by 'delete'
+
+
+class TorrentBatchResult(BaseModel):
+    action: str
+    processed: list[str]  # hashes the action was applied to
+    not_owned: list[str]  # hashes skipped because the user is not linked to them
+    shared: list[str] = []  # deleted hashes kept in qBittorrent for other users
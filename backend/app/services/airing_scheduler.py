@@ -0,0 +1,229 @@
+import asyncio
+import heapq
+import time
+from fastapi import HTTPException
+from typing import Optional
+
+from prometheus_client import Counter
+
+from app.core.config import settings
+from app.db.base import AsyncSessionLocal
+from app.db.repository.token_repo import AnilistTokenRepository
+from app.schemas.anilist import AnilistMedia
+from app.services.anilist_service import anilist_service
+from app.services.torrent_orchestration_service import torrent_orchestration_service
+
+AIRING_FETCHES = Counter(
+    "uuutorrent_airing_fetches_total",
+    "Newly aired episodes handled by the airing scheduler, by outcome "
+    "(linked, retried, gave_up).",
+    ["result"],
+)
+
+
+class _Airing:
+    __slots__ = ("media_id", "episode", "title", "airing_at", "due", "subscribers")
+
+    def __init__(self, media_id: int, episode: int, title: str, airing_at: int):
+        self.media_id = media_id
+        self.episode = episode
+        self.title = title
+        self.airing_at = airing_at
+        self.due: Optional[float] = None  # None while a search is running
+        self.subscribers: set[int] = set()
+
+    def __str__(self) -> str:
+        return f"'{self.title}' episode {self.episode}"
+
+
+def _media_title(media: AnilistMedia) -> str:
+    return (
+        media.title.userPreferred
+        or media.title.romaji
+        or media.title.english
+        or f"AnilistMedia_{media.id}"
+    )
+
+
+class AiringScheduler:
+    """
+    Fetches newly aired episodes before anyone asks for them.
+
+    Every `refresh_interval` seconds it reads the CURRENT list of every active user
+    with a linked Anilist account and schedules each show's next airing episode in a
+    heap ordered by airing time. `search_delay` seconds after an episode airs, one
+    Nyaa search runs for it, however many users follow the show; the best torrent is
+    added once and linked to all of them with a single insert. Episodes that are not
+    on Nyaa yet are searched again every `retry_interval` seconds until
+    `give_up_after` seconds past their airing time.
+
+    The schedule is kept in memory and rebuilt from Anilist after a restart. Enable it
+    on one instance only (AIRING_SCHEDULER_ENABLED).
+    """
+
+    def __init__(
+        self,
+        refresh_interval: float,
+        search_delay: float,
+        retry_interval: float,
+        give_up_after: float,
+        preferred_quality: str,
+        concurrency: int,
+    ):
+        self.refresh_interval = refresh_interval
+        self.search_delay = search_delay
+        self.retry_interval = retry_interval
+        self.give_up_after = give_up_after
+        self.preferred_quality = preferred_quality
+        self._limit = asyncio.Semaphore(concurrency)
+        self._heap: list[tuple[float, int, int]] = []  # (due, media_id, episode)
+        self._airings: dict[tuple[int, int], _Airing] = {}
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self._running: set[asyncio.Task] = set()
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+            print(
+                f"airing: Scheduler started (watchlists rescanned every {self.refresh_interval:.0f}s)."
+            )
+
+    async def stop(self) -> None:
+        tasks = [t for t in (self._task, *self._running) if t is not None]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._task = None
+
+    def _schedule(self, airing: _Airing, due: float) -> None:
+        airing.due = due
+        heapq.heappush(self._heap, (due, airing.media_id, airing.episode))
+        self._wakeup.set()
+
+    async def _run(self) -> None:
+        next_refresh = 0.0
+        while True:
+            if time.time() >= next_refresh:
+                try:
+                    await self.refresh()
+                except Exception as e:
+                    print(f"airing: Watchlist refresh failed: {e}")
+                next_refresh = time.time() + self.refresh_interval
+
+            self._wakeup.clear()
+            self._start_due(time.time())
+            wake_at = (
+                min(next_refresh, self._heap[0][0]) if self._heap else next_refresh
+            )
+            try:
+                await asyncio.wait_for(
+                    self._wakeup.wait(), timeout=max(0.0, wake_at - time.time())
+                )
+            except asyncio.TimeoutError:
+                pass
+
+    async def refresh(self) -> None:
+        """Schedules the next airing episode of every show on a user's CURRENT list."""
+        async with AsyncSessionLocal() as db:
+            tokens = await AnilistTokenRepository(db).get_active_tokens()
+
+        now = time.time()
+        followers: dict[tuple[int, int], set[int]] = {}
+        for token in tokens:
+            try:
+                viewer_id = await anilist_service.get_viewer_id(token.access_token)
+                watchlist = await anilist_service.get_user_list(
+                    user_token=token.access_token, user_id=viewer_id
+                )
+            except HTTPException as e:
+                print(f"airing: Skipping user {token.user_id}: {e.detail}")
+                continue
+
+            for entry in watchlist:
+                media = entry.media
+                next_episode = media.nextAiringEpisode
+                if next_episode is None or next_episode.airingAt < now:
+                    continue
+                key = (media.id, next_episode.episode)
+                followers.setdefault(key, set()).add(token.user_id)
+                airing = self._airings.get(key)
+                if airing is None:
+                    airing = _Airing(
+                        media.id,
+                        next_episode.episode,
+                        _media_title(media),
+                        next_episode.airingAt,
+                    )
+                    self._airings[key] = airing
+                    self._schedule(airing, airing.airing_at + self.search_delay)
+                elif (
+                    airing.due is not None and airing.airing_at != next_episode.airingAt
+                ):
+                    # Delayed or moved up; the old heap entry is skipped when popped.
+                    airing.airing_at = next_episode.airingAt
+                    self._schedule(airing, airing.airing_at + self.search_delay)
+
+        # Shows that aired since the last refresh keep their previous followers.
+        for key, user_ids in followers.items():
+            self._airings[key].subscribers = user_ids
+        print(
+            f"airing: {len(self._airings)} upcoming episodes for {len(tokens)} users."
+        )
+
+    def _start_due(self, now: float) -> None:
+        while self._heap and self._heap[0][0] <= now:
+            due, media_id, episode = heapq.heappop(self._heap)
+            airing = self._airings.get((media_id, episode))
+            if airing is None or airing.due != due:
+                continue  # rescheduled or already handled
+            airing.due = None
+            task = asyncio.create_task(self._fetch(airing))
+            self._running.add(task)
+            task.add_done_callback(self._running.discard)
+
+    async def _fetch(self, airing: _Airing) -> None:
+        key = (airing.media_id, airing.episode)
+        async with self._limit:
+            try:
+                selected = await torrent_orchestration_service.find_episode_torrent(
+                    airing.title, airing.episode, self.preferred_quality
+                )
+                async with AsyncSessionLocal() as db:
+                    torrent_hash = (
+                        await torrent_orchestration_service.add_and_link_users(
+                            db, sorted(airing.subscribers), selected
+                        )
+                    )
+                    await db.commit()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                error = e.detail if isinstance(e, HTTPException) else str(e)
+                retry_at = time.time() + self.retry_interval
+                if retry_at < airing.airing_at + self.give_up_after:
+                    print(
+                        f"airing: {airing} not fetched ({error}), retrying in {self.retry_interval:.0f}s"
+                    )
+                    AIRING_FETCHES.labels(result="retried").inc()
+                    self._schedule(airing, retry_at)
+                else:
+                    print(f"airing: Giving up on {airing}: {error}")
+                    AIRING_FETCHES.labels(result="gave_up").inc()
+                    self._airings.pop(key, None)
+            else:
+                print(
+                    f"airing: {airing} ready as {torrent_hash} for {len(airing.subscribers)} users"
+                )
+                AIRING_FETCHES.labels(result="linked").inc()
+                self._airings.pop(key, None)
+
+
+airing_scheduler = AiringScheduler(
+    refresh_interval=settings.AIRING_REFRESH_INTERVAL,
+    search_delay=settings.AIRING_SEARCH_DELAY,
+    retry_interval=settings.AIRING_RETRY_INTERVAL,
+    give_up_after=settings.AIRING_GIVE_UP_AFTER,
+    preferred_quality=settings.AIRING_PREFERRED_QUALITY,
+    concurrency=settings.AIRING_CONCURRENCY,
+)
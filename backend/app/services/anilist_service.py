@@ -1,61 +1,177 @@
 import httpx
-from typing import Optional
+from typing import Iterable, Optional
 from fastapi import HTTPException, status
 
+from app.core.batcher import Batcher
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.core.http import create_http_client
+from app.core.rate_limit import RateLimitTimeout, TokenBucket
+from app.core.singleflight import SingleFlight
+from app.db.base import AsyncSessionLocal
+from app.db.repository.media_repo import MediaRepository
 from app.schemas.anilist import AnilistEntry, AnilistMedia
 
 ANILIST_URL = "https://graphql.anilist.co"
 
 
+# Fields of a Media object that depend on the viewer or on the current time.
+USER_SPECIFIC_MEDIA_FIELDS = ("mediaListEntry", "nextAiringEpisode")
+
+
+def _int_header(response: httpx.Response, name: str) -> Optional[int]:
+    try:
+        return int(response.headers[name])
+    except (KeyError, ValueError):
+        return None
+
+
 class AnilistService:
+    def __init__(self):
+        self._client: Optional[httpx.AsyncClient] = None
+        # Anilist allows about 90 requests per minute; queue rather than get 429s.
+        self._rate_limiter = TokenBucket(
+            "anilist",
+            rate=settings.ANILIST_RATE_LIMIT_PER_MINUTE / 60.0,
+            capacity=settings.ANILIST_RATE_LIMIT_BURST,
+        )
+        # Shared media metadata (titles, format, episodes), the same for every user.
+        self._media_cache: TTLCache[dict] = TTLCache(
+            "anilist_media",
+            max_entries=settings.ANILIST_MEDIA_CACHE_MAX_ENTRIES,
+            ttl=settings.ANILIST_MEDIA_CACHE_TTL,
+        )
+        self._media_flight: SingleFlight[Optional[dict]] = SingleFlight("anilist_media")
+        # Lookups of different media IDs made close together share one Page query.
+        self._media_batcher: Batcher[int, dict] = Batcher(
+            "anilist_media",
+            self._fetch_media_batch,
+            window=settings.ANILIST_BATCH_WINDOW,
+            max_size=settings.ANILIST_BATCH_MAX_SIZE,
+        )
+        # A token always belongs to the same Anilist user, so its viewer ID is only
+        # resolved again when the stored token changes (a new key).
+        self._viewer_cache: TTLCache[int] = TTLCache(
+            "anilist_viewer",
+            max_entries=settings.ANILIST_CACHE_MAX_ENTRIES,
+            ttl=settings.ANILIST_VIEWER_CACHE_TTL,
+        )
+        self._viewer_flight: SingleFlight[int] = SingleFlight("anilist_viewer")
+        # Watchlists per Anilist user ID; dropped whenever progress is changed here.
+        self._watchlist_cache: TTLCache[list[AnilistEntry]] = TTLCache(
+            "anilist_watchlist",
+            max_entries=settings.ANILIST_CACHE_MAX_ENTRIES,
+            ttl=settings.ANILIST_WATCHLIST_CACHE_TTL,
+        )
+        self._watchlist_flight: SingleFlight[list[AnilistEntry]] = SingleFlight(
+            "anilist_watchlist"
+        )
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """The shared, pooled client for the Anilist GraphQL API (created on first use)."""
+        if self._client is None or self._client.is_closed:
+            self._client = create_http_client("anilist")
+        return self._client
+
+    def start(self):
+        self.client
+
+    async def close(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
 
     async def _make_request(
-        self, user_token: str, query: str, variables: Optional[dict] = None
+        self, user_token: Optional[str], query: str, variables: Optional[dict] = None
     ) -> dict:
+        """Sends a GraphQL query; without a token it is sent anonymously."""
         headers = {
-            "Authorization": f"Bearer {user_token}",
             "Content-Type": "application/json",
             "Accept": "application/json",
         }
+        if user_token:
+            headers["Authorization"] = f"Bearer {user_token}"
         json_payload = {"query": query}
         if variables:
             json_payload["variables"] = variables
 
-        async with httpx.AsyncClient() as client:
-            try:
-                response = await client.post(
+        try:
+            for attempt in range(settings.ANILIST_MAX_RETRIES + 1):
+                await self._rate_limiter.acquire(timeout=settings.ANILIST_QUEUE_TIMEOUT)
+                response = await self.client.post(
                     ANILIST_URL, json=json_payload, headers=headers, timeout=20.0
                 )
-                response.raise_for_status()
-                data = response.json()
-                if "errors" in data:
-                    print(f"Anilist API Error: {data['errors']}")
-                    raise HTTPException(
-                        status_code=status.HTTP_502_BAD_GATEWAY,
-                        detail=f"Anilist API error: {data['errors'][0]['message']}",
-                    )
-                return data["data"]
-            except httpx.RequestError as exc:
-                print(f"An error occurred while requesting {exc.request.url!r}.")
+                self._rate_limiter.observe(
+                    _int_header(response, "X-RateLimit-Remaining")
+                )
+                if response.status_code != status.HTTP_429_TOO_MANY_REQUESTS:
+                    break
+                # Hold back every queued request, then retry this one.
+                retry_after = _int_header(response, "Retry-After") or 60
+                print(f"Anilist rate limit hit, pausing requests for {retry_after}s.")
+                self._rate_limiter.block_for(retry_after)
+            response.raise_for_status()
+            data = response.json()
+            if "errors" in data:
+                print(f"Anilist API Error: {data['errors']}")
                 raise HTTPException(
-                    status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
-                    detail="Could not connect to Anilist API.",
+                    status_code=status.HTTP_502_BAD_GATEWAY,
+                    detail=f"Anilist API error: {data['errors'][0]['message']}",
                 )
-            except httpx.HTTPStatusError as exc:
-                print(
-                    f"HTTP error {exc.response.status_code} while requesting {exc.request.url!r}."
+            return data["data"]
+        except RateLimitTimeout as exc:
+            print(f"Anilist request dropped: {exc}")
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Anilist rate limit reached, try again later.",
+                headers={"Retry-After": str(int(settings.ANILIST_QUEUE_TIMEOUT))},
+            )
+        except httpx.RequestError as exc:
+            print(f"An error occurred while requesting {exc.request.url!r}.")
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Could not connect to Anilist API.",
+            )
+        except httpx.HTTPStatusError as exc:
+            print(
+                f"HTTP error {exc.response.status_code} while requesting {exc.request.url!r}."
+            )
+            if exc.response.status_code == 401:
+                raise HTTPException(
+                    status_code=status.HTTP_401_UNAUTHORIZED,
+                    detail="Invalid Anilist token.",
                 )
-                if exc.response.status_code == 401:
-                    raise HTTPException(
-                        status_code=status.HTTP_401_UNAUTHORIZED,
-                        detail="Invalid Anilist token.",
-                    )
+            if exc.response.status_code == status.HTTP_429_TOO_MANY_REQUESTS:
                 raise HTTPException(
-                    status_code=status.HTTP_502_BAD_GATEWAY,
-                    detail=f"Anilist API returned status {exc.response.status_code}",
+                    status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                    detail="Anilist rate limit reached, try again later.",
+                    headers={
+                        "Retry-After": exc.response.headers.get("Retry-After", "60")
+                    },
                 )
+            raise HTTPException(
+                status_code=status.HTTP_502_BAD_GATEWAY,
+                detail=f"Anilist API returned status {exc.response.status_code}",
+            )
+
+    async def get_viewer_id(self, user_token: str, refresh: bool = False) -> int:
+        """
+        Returns the Anilist user ID that owns the token (cached per token).
+        With refresh=True the token is checked against Anilist again.
+        """
+        if refresh:
+            viewer_id = await self._fetch_viewer_id(user_token)
+            self._viewer_cache.set(user_token, viewer_id)
+            return viewer_id
+        return await self._viewer_cache.get_or_fetch(
+            user_token,
+            lambda: self._viewer_flight.do(
+                user_token, lambda: self._fetch_viewer_id(user_token)
+            ),
+        )
 
-    async def get_viewer_id(self, user_token: str) -> int:
+    async def _fetch_viewer_id(self, user_token: str) -> int:
         query = """
         query {
             Viewer { id }
@@ -71,8 +187,30 @@ class AnilistService:
 
     async def get_user_list(self, user_token: str, user_id: int) -> list[AnilistEntry]:
         """
-        Fetches the user's 'CURRENT' watching list from Anilist.
+        Fetches the user's 'CURRENT' watching list from Anilist, reusing a recent
+        copy for up to ANILIST_WATCHLIST_CACHE_TTL seconds.
         """
+        watchlist = await self._watchlist_cache.get_or_fetch(
+            user_id,
+            lambda: self._watchlist_flight.do(
+                user_id, lambda: self._fetch_user_list(user_token, user_id)
+            ),
+        )
+        return list(watchlist)
+
+    def invalidate_user_list(self, user_token: str) -> None:
+        """Drops the cached watchlist of the token's owner."""
+        viewer_id = self._viewer_cache.get(user_token)
+        if viewer_id is not None:
+            self._watchlist_cache.invalidate(viewer_id)
+        else:
+            # Unknown owner (e.g. evicted): better to drop every watchlist than
+            # to keep serving an outdated one.
+            self._watchlist_cache.clear()
+
+    async def _fetch_user_list(
+        self, user_token: str, user_id: int
+    ) -> list[AnilistEntry]:
         query = """
         query ($userId: Int, $status: MediaListStatus) {
             MediaListCollection (userId: $userId, status: $status, type: ANIME) {
@@ -106,13 +244,16 @@ class AnilistService:
 
         try:
             watchlist = [AnilistEntry(**entry) for entry in entries_data]
-            return watchlist
         except Exception as e:
             print(f"Error parsing Anilist watchlist data: {e}")
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 detail="Failed to parse watchlist data from Anilist.",
             )
+        # The watchlist carries the same media fields, so later downloads of these
+        # shows need no media lookup.
+        await self._remember_media(entry["media"] for entry in entries_data)
+        return watchlist
 
     async def set_progress(self, user_token: str, media_id: int, progress: int) -> bool:
         """
@@ -128,9 +269,12 @@ class AnilistService:
         variables = {"mediaId": media_id, "progress": progress}
         try:
             data = await self._make_request(user_token, query, variables)
-            return (
+            saved = (
                 "SaveMediaListEntry" in data and data["SaveMediaListEntry"] is not None
             )
+            if saved:
+                self.invalidate_user_list(user_token)
+            return saved
         except HTTPException as e:
             raise e
         except Exception as e:
@@ -138,30 +282,28 @@ class AnilistService:
             return False
 
     async def get_media_details(
-        self, user_token: str, media_id: int
+        self, user_token: Optional[str], media_id: int
     ) -> Optional[AnilistMedia]:
         """
         Fetches details for a specific media item from Anilist using its ID.
-        Returns an AnilistMedia object or None if not found.
+        Returns an AnilistMedia object or None if not found. The lookup is anonymous;
+        `user_token` is accepted for existing callers but not sent.
         """
-        query = """
-        query ($id: Int) {
-            Media (id: $id, type: ANIME) {
-                id
-                title { romaji english native userPreferred }
-                format status description episodes duration source
-                # Add any other fields you might eventually need
-            }
-        }
-        """
-        variables = {"id": media_id}
+        media_data = self._media_cache.get(media_id)
+        if media_data is not None:
+            return AnilistMedia(**media_data)
         try:
-            data = await self._make_request(user_token, query, variables)
+            # Media details are public and not user-specific, so concurrent lookups
+            # of the same ID share one request and lookups of different IDs are
+            # batched into one anonymous query: one user's revoked token must not
+            # fail the lookups of everyone else in the batch.
+            media_data = await self._media_flight.do(
+                media_id, lambda: self._media_batcher.load(media_id)
+            )
 
-            if not data or "Media" not in data or data["Media"] is None:
+            if media_data is None:
                 print(f"No media details found on Anilist for ID: {media_id}")
                 return None
-            media_data = data["Media"]
             return AnilistMedia(**media_data)
 
         except HTTPException as e:
@@ -175,5 +317,71 @@ class AnilistService:
             )
             return None
 
+    async def _fetch_media_batch(
+        self, media_ids: list[int], _context: object = None
+    ) -> dict[int, dict]:
+        """
+        Fetches several media items in one anonymous Page query, keyed by media ID. With
+        ANILIST_MEDIA_PERSIST, items stored in Postgres are used first and the
+        fetched ones are stored.
+        """
+        found: dict[int, dict] = {}
+        if settings.ANILIST_MEDIA_PERSIST:
+            found = await self._load_persisted_media(media_ids)
+            media_ids = [media_id for media_id in media_ids if media_id not in found]
+            if not media_ids:
+                self._cache_media(found.values())
+                return found
+
+        query = """
+        query ($ids: [Int], $perPage: Int) {
+            Page (perPage: $perPage) {
+                media (id_in: $ids, type: ANIME) {
+                    id
+                    title { romaji english native userPreferred }
+                    format status description episodes duration source
+                    # Add any other fields you might eventually need
+                }
+            }
+        }
+        """
+        variables = {"ids": media_ids, "perPage": len(media_ids)}
+        data = await self._make_request(None, query, variables)
+        media = (data or {}).get("Page", {}).get("media") or []
+        fetched = {item["id"]: item for item in media}
+        await self._remember_media(fetched.values())
+        self._cache_media(found.values())
+        return found | fetched
+
+    def _cache_media(self, media: Iterable[dict]) -> None:
+        for item in media:
+            self._media_cache.set(item["id"], item)
+
+    async def _remember_media(self, media: Iterable[dict]) -> None:
+        """Stores shared media fields in the process cache (and Postgres if enabled)."""
+        media = [
+            {k: v for k, v in item.items() if k not in USER_SPECIFIC_MEDIA_FIELDS}
+            for item in media
+        ]
+        self._cache_media(media)
+        if not settings.ANILIST_MEDIA_PERSIST or not media:
+            return
+        try:
+            async with AsyncSessionLocal() as db:
+                await MediaRepository(db).upsert_media(media)
+                await db.commit()
+        except Exception as e:
+            print(f"Warning: could not persist Anilist media metadata: {e}")
+
+    async def _load_persisted_media(self, media_ids: list[int]) -> dict[int, dict]:
+        try:
+            async with AsyncSessionLocal() as db:
+                return await MediaRepository(db).get_fresh_media(
+                    media_ids, max_age_seconds=settings.ANILIST_MEDIA_CACHE_TTL
+                )
+        except Exception as e:
+            print(f"Warning: could not load persisted Anilist media metadata: {e}")
+            return {}
+
 
 anilist_service = AnilistService()
@@ -0,0 +1,236 @@
+import asyncio
+import random
+from fastapi import HTTPException, status
+from typing import Optional
+
+from prometheus_client import Counter
+
+from app.core.config import settings
+from app.db.base import AsyncSessionLocal
+from app.db.models import DownloadJob
+from app.db.repository.job_repo import JobRepository
+from app.db.repository.token_repo import AnilistTokenRepository
+from app.services.anilist_service import anilist_service
+from app.services.torrent_orchestration_service import torrent_orchestration_service
+
+JOBS_PROCESSED = Counter(
+    "uuutorrent_jobs_total",
+    "Download job attempts by outcome (succeeded, retried, failed, released).",
+    ["result"],
+)
+
+# Client errors that will not go away by retrying. Everything else (5xx, 429, "no
+# torrent found yet", network and database errors) is retried with backoff.
+_PERMANENT_STATUSES = {
+    status.HTTP_400_BAD_REQUEST,
+    status.HTTP_401_UNAUTHORIZED,
+    status.HTTP_403_FORBIDDEN,
+    status.HTTP_409_CONFLICT,
+    status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+    status.HTTP_422_UNPROCESSABLE_ENTITY,
+}
+
+
+class JobFailed(Exception):
+    """A job failure that should not be retried."""
+
+
+class JobQueue:
+    """
+    Runs watchlist download jobs persisted in the download_jobs table.
+
+    A pool of async workers claims due jobs with FOR UPDATE SKIP LOCKED, so several
+    app instances can share the table. Each upstream (Anilist, Nyaa, qBittorrent)
+    has its own concurrency limit across all workers. Failed attempts are retried
+    with exponential backoff and jitter until JOB_MAX_ATTEMPTS is reached.
+
+    A claimed job carries a lease (JOB_LEASE_SECONDS); if the worker dies, the job
+    becomes claimable again once the lease runs out.
+    """
+
+    def __init__(
+        self,
+        workers: int,
+        max_attempts: int,
+        retry_base_delay: float,
+        retry_max_delay: float,
+        lease_seconds: float,
+        poll_interval: float,
+        upstream_limits: dict[str, int],
+    ):
+        self.workers = workers
+        self.max_attempts = max_attempts
+        self.retry_base_delay = retry_base_delay
+        self.retry_max_delay = retry_max_delay
+        self.lease_seconds = lease_seconds
+        self.poll_interval = poll_interval
+        self._limits = {
+            name: asyncio.Semaphore(limit) for name, limit in upstream_limits.items()
+        }
+        self._wakeup = asyncio.Event()
+        self._tasks: list[asyncio.Task] = []
+
+    def notify(self) -> None:
+        """Wakes idle workers, e.g. right after a job was committed."""
+        self._wakeup.set()
+
+    def start(self) -> None:
+        if self._tasks:
+            return
+        self._tasks = [
+            asyncio.create_task(self._worker(n)) for n in range(self.workers)
+        ]
+        print(f"jobs: Started {self.workers} download workers.")
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def _worker(self, n: int) -> None:
+        while True:
+            # Clear before looking, so a notify() that races with an empty claim
+            # still wakes this worker immediately.
+            self._wakeup.clear()
+            try:
+                claimed = await self._run_next()
+            except Exception as e:
+                print(f"jobs: Worker {n} failed to claim a job: {e}")
+                claimed = False
+            if claimed:
+                continue
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _run_next(self) -> bool:
+        """Claims and processes one job. Returns False if none was due."""
+        async with AsyncSessionLocal() as db:
+            job = await JobRepository(db).claim_next(self.lease_seconds)
+            await db.commit()
+        if job is None:
+            return False
+        await self._process(job)
+        return True
+
+    async def _process(self, job: DownloadJob) -> None:
+        print(
+            f"jobs: Running job {job.id} (media {job.media_id}, episode {job.episode}, attempt {job.attempts})"
+        )
+        try:
+            torrent_hash = await self._execute(job)
+        except asyncio.CancelledError:
+            # Shutting down: hand the job back instead of waiting for the lease.
+            await self._update(job, "released", error="Worker stopped.", delay=0.0)
+            raise
+        except Exception as e:
+            error = self._describe(e)
+            if self._is_retryable(e) and job.attempts < self.max_attempts:
+                delay = self._backoff(job.attempts)
+                print(f"jobs: Job {job.id} failed ({error}), retrying in {delay:.0f}s")
+                await self._update(job, "retried", error=error, delay=delay)
+            else:
+                print(f"jobs: Job {job.id} failed permanently: {error}")
+                await self._update(job, "failed", error=error)
+        else:
+            print(f"jobs: Job {job.id} succeeded with torrent {torrent_hash}")
+            await self._update(job, "succeeded", torrent_hash=torrent_hash)
+
+    async def _execute(self, job: DownloadJob) -> str:
+        """Performs one attempt of a job and returns the linked torrent hash."""
+        async with AsyncSessionLocal() as db:
+            token = await AnilistTokenRepository(db).get_token(job.user_id)
+        if not token or not token.access_token:
+            raise JobFailed("Anilist token not found for this user.")
+
+        async with self._limits["anilist"]:
+            media_details = await anilist_service.get_media_details(
+                user_token=token.access_token, media_id=job.media_id
+            )
+        if not media_details:
+            raise JobFailed(
+                f"Could not find media details on Anilist for ID {job.media_id}."
+            )
+
+        media_title = media_details.title.userPreferred or media_details.title.romaji
+        if not media_title:
+            media_title = media_details.title.english or f"AnilistMedia_{job.media_id}"
+            print(
+                f"Warning: Using fallback title '{media_title}' for media ID {job.media_id}"
+            )
+
+        async with self._limits["nyaa"]:
+            selected_torrent = await torrent_orchestration_service.find_episode_torrent(
+                media_title, job.episode, job.preferred_quality
+            )
+
+        async with self._limits["qbittorrent"]:
+            async with AsyncSessionLocal() as db:
+                torrent_hash = await torrent_orchestration_service.add_and_link(
+                    db, job.user_id, selected_torrent
+                )
+                await db.commit()
+        return torrent_hash
+
+    async def _update(
+        self,
+        job: DownloadJob,
+        result: str,
+        error: Optional[str] = None,
+        delay: float = 0.0,
+        torrent_hash: Optional[str] = None,
+    ) -> None:
+        async with AsyncSessionLocal() as db:
+            repo = JobRepository(db)
+            if result == "succeeded":
+                updated = await repo.mark_succeeded(job.id, job.attempts, torrent_hash)
+            elif result == "failed":
+                updated = await repo.mark_failed(job.id, job.attempts, error)
+            else:
+                # A released attempt does not count towards max_attempts.
+                updated = await repo.schedule_retry(
+                    job.id,
+                    job.attempts,
+                    error,
+                    delay,
+                    refund_attempt=result == "released",
+                )
+            await db.commit()
+        if not updated:
+            print(f"jobs: Job {job.id} was re-claimed elsewhere, result dropped.")
+        JOBS_PROCESSED.labels(result=result).inc()
+
+    def _backoff(self, attempts: int) -> float:
+        delay = min(self.retry_max_delay, self.retry_base_delay * 2 ** (attempts - 1))
+        return delay * random.uniform(0.5, 1.0)
+
+    @staticmethod
+    def _is_retryable(exc: Exception) -> bool:
+        if isinstance(exc, JobFailed):
+            return False
+        if isinstance(exc, HTTPException):
+            return exc.status_code not in _PERMANENT_STATUSES
+        return True
+
+    @staticmethod
+    def _describe(exc: Exception) -> str:
+        if isinstance(exc, HTTPException):
+            return f"{exc.status_code}: {exc.detail}"
+        return str(exc) or type(exc).__name__
+
+
+job_queue = JobQueue(
+    workers=settings.JOB_WORKERS,
+    max_attempts=settings.JOB_MAX_ATTEMPTS,
+    retry_base_delay=settings.JOB_RETRY_BASE_DELAY,
+    retry_max_delay=settings.JOB_RETRY_MAX_DELAY,
+    lease_seconds=settings.JOB_LEASE_SECONDS,
+    poll_interval=settings.JOB_POLL_INTERVAL,
+    upstream_limits={
+        "anilist": settings.JOB_ANILIST_CONCURRENCY,
+        "nyaa": settings.JOB_NYAA_CONCURRENCY,
+        "qbittorrent": settings.JOB_QBITTORRENT_CONCURRENCY,
+    },
+)
@@ -0,0 +1,170 @@
+import urllib.parse
+import xml.etree.ElementTree as ET
+from typing import Optional
+
+_SIZE_UNITS = {
+    "bytes": 1,
+    "b": 1,
+    "kib": 1024,
+    "mib": 1024**2,
+    "gib": 1024**3,
+    "tib": 1024**4,
+}
+
+
+def _parse_int(value: Optional[str]) -> int:
+    """Safely parse a non-negative integer from string, defaulting to 0."""
+    if not value:
+        return 0
+    try:
+        return int(value)
+    except ValueError:
+        return 0
+
+
+def parse_size(value: Optional[str]) -> int:
+    """Parses Nyaa's human readable size (e.g. '1.4 GiB') into bytes, 0 if unknown."""
+    if not value:
+        return 0
+    number, _, unit = value.strip().partition(" ")
+    try:
+        return int(float(number) * _SIZE_UNITS.get(unit.lower(), 1))
+    except ValueError:
+        return 0
+
+
+class NyaaResult:
+    __slots__ = (
+        "title",
+        "torrent_file_url",
+        "info_hash",
+        "guid",
+        "pubDate",
+        "seeders",
+        "leechers",
+        "downloads",
+        "size",
+        "category",
+        "trusted",
+        "remake",
+        "_features",  # parsed title features, filled lazily by torrent_ranking
+    )
+
+    def __init__(
+        self,
+        title: str,
+        torrent_file_url: Optional[str] = None,
+        info_hash: Optional[str] = None,
+        guid: Optional[str] = None,
+        pubDate: Optional[str] = None,
+        seeders: int = 0,
+        leechers: int = 0,
+        downloads: int = 0,
+        size: int = 0,
+        category: Optional[str] = None,
+        trusted: bool = False,
+        remake: bool = False,
+    ):
+        self.title = title
+        self.torrent_file_url = torrent_file_url
+        self.info_hash = info_hash
+        self.guid = guid
+        self.pubDate = pubDate
+        self.seeders = seeders
+        self.leechers = leechers
+        self.downloads = downloads
+        self.size = size  # bytes
+        self.category = category
+        self.trusted = trusted
+        self.remake = remake
+        self._features = None
+
+    @classmethod
+    def from_item(cls, fields: dict[str, Optional[str]]) -> "NyaaResult":
+        """Builds a result from an <item>'s child elements, keyed by local tag name."""
+        return cls(
+            title=fields.get("title") or "N/A",
+            torrent_file_url=fields.get("link"),
+            info_hash=fields.get("infoHash") or None,
+            guid=fields.get("guid"),
+            pubDate=fields.get("pubDate"),
+            seeders=_parse_int(fields.get("seeders")),
+            leechers=_parse_int(fields.get("leechers")),
+            downloads=_parse_int(fields.get("downloads")),
+            size=parse_size(fields.get("size")),
+            category=fields.get("category"),
+            trusted=(fields.get("trusted") or "").lower() == "yes",
+            remake=(fields.get("remake") or "").lower() == "yes",
+        )
+
+    @property
+    def magnet_link(self) -> Optional[str]:
+        """Constructs a basic magnet link if info_hash is available."""
+        if not self.info_hash:
+            return None
+        magnet = f"magnet:?xt=urn:btih:{self.info_hash}"
+        encoded_title = urllib.parse.quote_plus(self.title)
+        magnet += f"&dn={encoded_title}"
+        # Add common trackers (optional, can increase chances of finding peers)
+        # magnet += "&tr=udp%3A%2F%2Ftracker.openbittorrent.com%3A80%2Fannounce"
+        # magnet += "&tr=udp%3A%2F%2Ftracker.opentrackr.org%3A1337%2Fannounce"
+        return magnet
+
+    def __repr__(self):
+        return f"<NyaaResult title='{self.title}' hash='{self.info_hash}' seeders={self.seeders}>"
+
+
+class NyaaFeedParser:
+    """
+    Incremental pull parser for Nyaa's RSS feed. Only <item> children are collected
+    (by local name, so 'nyaa:seeders' becomes 'seeders'); everything else in the feed
+    is skipped. Feed bytes as they arrive with feed(), then call close() for results.
+
+    A malformed document stops parsing but keeps the items parsed before the error,
+    mirroring feedparser's lenient 'bozo' behaviour.
+    """
+
+    def __init__(self):
+        self._parser = ET.XMLPullParser(events=("start", "end"))
+        self._results: list[NyaaResult] = []
+        self._item: Optional[dict[str, Optional[str]]] = None
+        self.error: Optional[ET.ParseError] = None
+
+    def feed(self, data: bytes) -> None:
+        if self.error is not None:
+            return
+        try:
+            self._parser.feed(data)
+            self._drain()
+        except ET.ParseError as e:
+            self.error = e
+
+    def close(self) -> list[NyaaResult]:
+        if self.error is None:
+            try:
+                self._parser.close()
+                self._drain()
+            except ET.ParseError as e:
+                self.error = e
+        return self._results
+
+    def _drain(self) -> None:
+        for event, elem in self._parser.read_events():
+            name = elem.tag.rpartition("}")[2]
+            if event == "start":
+                if name == "item":
+                    self._item = {}
+            elif name == "item":
+                if self._item is not None:
+                    self._results.append(NyaaResult.from_item(self._item))
+                self._item = None
+                elem.clear()
+            elif self._item is not None:
+                self._item[name] = elem.text
+
+
+def parse_feed(data: bytes) -> list[NyaaResult]:
+    """Parses a complete Nyaa RSS document."""
+    parser = NyaaFeedParser()
+    parser.feed(data)
+    return parser.close()
@@ -1,84 +1,57 @@
 import httpx
-import feedparser
 import urllib.parse
 from typing import Optional
 
+from app.core.cache import TTLCache
 from app.core.config import settings
+from app.core.http import create_http_client
+from app.core.singleflight import SingleFlight
+from app.services.nyaa_parser import NyaaFeedParser, NyaaResult
 
 
-class NyaaResult:
-    def __init__(self, entry):
-        self.title: str = entry.get("title", "N/A")
-        self.torrent_file_url: Optional[str] = entry.get("link")
-        self.info_hash: Optional[str] = entry.get("nyaa_infohash")
-        if not self.info_hash:
-            self.info_hash = entry.get("nyaa:infohash")
-
-        self.guid: Optional[str] = entry.get("guid")
-        self.pubDate: Optional[str] = entry.get("published")
-        self.seeders: Optional[int] = self._parse_int(entry.get("nyaa_seeders"))
-        self.leechers: Optional[int] = self._parse_int(entry.get("nyaa_leechers"))
-        self.downloads: Optional[int] = self._parse_int(entry.get("nyaa_downloads"))
-        self.size: Optional[str] = entry.get("nyaa_size")
-        self.category: Optional[str] = entry.get("nyaa_category")
-        self.trusted: bool = entry.get("nyaa_trusted", "").lower() == "yes"
-        self.remake: bool = entry.get("nyaa_remake", "").lower() == "yes"
-
-    def _parse_int(self, value: Optional[str]) -> Optional[int]:
-        """Safely parse an integer from string."""
-        if value is None:
-            return None
-        try:
-            return int(value)
-        except (ValueError, TypeError):
-            return None
+class NyaaService:
+    def __init__(self):
+        self._client: Optional[httpx.AsyncClient] = None
+        self._search_cache: TTLCache[list[NyaaResult]] = TTLCache(
+            "nyaa_search",
+            max_entries=settings.NYAA_CACHE_MAX_ENTRIES,
+            ttl=settings.NYAA_CACHE_TTL,
+            stale_ttl=settings.NYAA_CACHE_STALE_TTL,
+            negative_ttl=settings.NYAA_CACHE_EMPTY_TTL,
+        )
+        self._search_flight: SingleFlight[list[NyaaResult]] = SingleFlight(
+            "nyaa_search"
+        )
 
     @property
-    def magnet_link(self) -> Optional[str]:
-        """Constructs a basic magnet link if info_hash is available."""
-        if not self.info_hash:
-            return None
-        magnet = f"magnet:?xt=urn:btih:{self.info_hash}"
-        encoded_title = urllib.parse.quote_plus(self.title)
-        magnet += f"&dn={encoded_title}"
-        # Add common trackers (optional, can increase chances of finding peers)
-        # magnet += "&tr=udp%3A%2F%2Ftracker.openbittorrent.com%3A80%2Fannounce"
-        # magnet += "&tr=udp%3A%2F%2Ftracker.opentrackr.org%3A1337%2Fannounce"
-        return magnet
+    def client(self) -> httpx.AsyncClient:
+        """The shared, pooled client for nyaa.si (created on first use)."""
+        if self._client is None or self._client.is_closed:
+            self._client = create_http_client("nyaa", follow_redirects=True)
+        return self._client
 
-    def __repr__(self):
-        return f"<NyaaResult title='{self.title}' hash='{self.info_hash}' seeders={self.seeders}>"
+    def start(self):
+        self.client
 
+    async def close(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
 
-class NyaaService:
     async def search(self, query: str, category: str = "1_2") -> list[NyaaResult]:
-        """Searches Nyaa.si using its RSS feed."""
-        encoded_query = urllib.parse.quote_plus(query)
-        # f=2 -> Trusted Only; c=1_2 -> Anime Eng-translated; q=query
-        search_url = f"{settings.NYAA_RSS_URL}&q={encoded_query}&c={category}&f=2"
-
-        results = []
+        """
+        Searches Nyaa.si using its RSS feed. Parsed results are cached per
+        (query, category); errors are logged and yield an empty list.
+        """
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.get(
-                    search_url, follow_redirects=True, timeout=20.0
-                )
-                response.raise_for_status()
-
-            if not response.text:
-                print(f"Empty response from Nyaa for query: {query}")
-                return []
-
-            feed = feedparser.parse(response.text)
-
-            if feed.bozo:
-                print(
-                    f"Warning: feedparser encountered potential issues parsing Nyaa feed for query: {query}. Error: {feed.bozo_exception}"
-                )
-
-            for entry in feed.entries:
-                results.append(NyaaResult(entry))
-
+            key = (query, category)
+            results = await self._search_cache.get_or_fetch(
+                key,
+                lambda: self._search_flight.do(
+                    key, lambda: self._fetch(query, category)
+                ),
+            )
+            return list(results)
         except httpx.RequestError as exc:
             print(f"Nyaa search failed for query '{query}': {exc}")
             return []
@@ -91,6 +64,30 @@ class NyaaService:
             print(f"Unexpected error parsing Nyaa feed for query '{query}': {e}")
             return []
 
+    async def _fetch(self, query: str, category: str) -> list[NyaaResult]:
+        """Fetches and parses one RSS search. Raises on HTTP/network errors."""
+        encoded_query = urllib.parse.quote_plus(query)
+        # f=2 -> Trusted Only; c=1_2 -> Anime Eng-translated; q=query
+        search_url = f"{settings.NYAA_RSS_URL}&q={encoded_query}&c={category}&f=2"
+
+        parser = NyaaFeedParser()
+        received = 0
+        async with self.client.stream("GET", search_url, timeout=20.0) as response:
+            response.raise_for_status()
+            # Parse while the body streams in instead of buffering the whole feed.
+            async for chunk in response.aiter_bytes():
+                received += len(chunk)
+                parser.feed(chunk)
+
+        if not received:
+            print(f"Empty response from Nyaa for query: {query}")
+            return []
+
+        results = parser.close()
+        if parser.error is not None:
+            print(
+                f"Warning: Nyaa feed for query '{query}' is malformed, kept {len(results)} items. Error: {parser.error}"
+            )
         return results
 
 
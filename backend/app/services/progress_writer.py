@@ -0,0 +1,162 @@
+import asyncio
+import time
+from fastapi import HTTPException, status
+from typing import Optional
+
+from prometheus_client import Counter
+
+from app.core.config import settings
+from app.services.anilist_service import anilist_service
+
+PROGRESS_UPDATES = Counter(
+    "uuutorrent_progress_updates_total",
+    "Anilist progress updates: received from clients, coalesced into a later one, "
+    "sent to Anilist, or failed.",
+    ["result"],
+)
+
+MAX_SEND_ATTEMPTS = 3
+
+
+class _PendingProgress:
+    __slots__ = ("user_token", "progress", "due", "deadline", "attempts", "wake")
+
+    def __init__(self, user_token: str, progress: int, due: float, deadline: float):
+        self.user_token = user_token
+        self.progress = progress
+        self.due = due  # debounce: pushed back by every new value
+        self.deadline = deadline  # never pushed back, so steady clicking still flushes
+        self.attempts = 0
+        self.wake = asyncio.Event()
+
+
+class ProgressWriter:
+    """
+    Write-behind buffer for Anilist progress updates. Updates for the same
+    (user, media) within `debounce` seconds of each other are merged and only the
+    last value is sent, at most `max_delay` seconds after the first one. Sends for
+    one (user, media) never overlap, so Anilist always ends on the latest value.
+
+    Pending values are kept in memory: close() flushes them on shutdown, but a crash
+    loses at most the last few seconds of clicks.
+    """
+
+    def __init__(self, debounce: float, max_delay: float):
+        self.debounce = debounce
+        self.max_delay = max_delay
+        self._pending: dict[tuple[int, int], _PendingProgress] = {}
+        self._tasks: dict[tuple[int, int], asyncio.Task] = {}
+        self._closing = False
+
+    def submit(self, user_id: int, user_token: str, media_id: int, progress: int):
+        """Buffers a progress value; returns immediately."""
+        PROGRESS_UPDATES.labels(result="received").inc()
+        key = (user_id, media_id)
+        now = time.monotonic()
+        entry = self._pending.get(key)
+        if entry is not None:
+            PROGRESS_UPDATES.labels(result="coalesced").inc()
+            entry.user_token = user_token
+            entry.progress = progress
+            entry.due = now + self.debounce
+            entry.attempts = 0
+        else:
+            entry = _PendingProgress(
+                user_token, progress, now + self.debounce, now + self.max_delay
+            )
+            self._pending[key] = entry
+            self._schedule(key, entry)
+        if self._closing:
+            entry.wake.set()
+
+    def pending_for(self, user_id: int) -> dict[int, int]:
+        """Progress values not yet sent to Anilist, keyed by media ID."""
+        return {
+            media_id: entry.progress
+            for (pending_user_id, media_id), entry in self._pending.items()
+            if pending_user_id == user_id
+        }
+
+    def _schedule(self, key: tuple[int, int], entry: _PendingProgress) -> None:
+        previous = self._tasks.get(key)
+        task = asyncio.create_task(self._flush_after(key, entry, previous))
+        self._tasks[key] = task
+        task.add_done_callback(
+            lambda t: self._tasks.pop(key) if self._tasks.get(key) is t else None
+        )
+
+    async def _flush_after(
+        self,
+        key: tuple[int, int],
+        entry: _PendingProgress,
+        previous: Optional[asyncio.Task],
+    ) -> None:
+        while not self._closing:
+            delay = min(entry.due, entry.deadline) - time.monotonic()
+            if delay <= 0:
+                break
+            try:
+                await asyncio.wait_for(entry.wake.wait(), timeout=delay)
+            except asyncio.TimeoutError:
+                pass
+        if previous is not None:
+            # Let an earlier, still running send finish before sending a newer value.
+            await asyncio.gather(previous, return_exceptions=True)
+        if self._pending.get(key) is entry:
+            del self._pending[key]
+        await self._send(key, entry)
+
+    async def _send(self, key: tuple[int, int], entry: _PendingProgress) -> None:
+        user_id, media_id = key
+        entry.attempts += 1
+        try:
+            saved = await anilist_service.set_progress(
+                user_token=entry.user_token, media_id=media_id, progress=entry.progress
+            )
+            if not saved:
+                raise HTTPException(
+                    status_code=status.HTTP_502_BAD_GATEWAY,
+                    detail="Anilist did not save the entry.",
+                )
+        except HTTPException as e:
+            retry = (
+                e.status_code != status.HTTP_401_UNAUTHORIZED
+                and entry.attempts < MAX_SEND_ATTEMPTS
+                and key not in self._pending  # a newer value supersedes this one
+            )
+            print(
+                f"Failed to set Anilist progress for user {user_id}, media {media_id} to {entry.progress}: {e.detail}"
+                + (" (will retry)" if retry else "")
+            )
+            if retry:
+                entry.due = entry.deadline = time.monotonic() + self.debounce
+                self._pending[key] = entry
+                self._schedule(key, entry)
+            else:
+                PROGRESS_UPDATES.labels(result="failed").inc()
+        else:
+            PROGRESS_UPDATES.labels(result="sent").inc()
+
+    async def close(self, timeout: float = 10.0) -> None:
+        """Sends every pending update now and waits up to `timeout` seconds."""
+        self._closing = True
+        for entry in self._pending.values():
+            entry.wake.set()
+        deadline = time.monotonic() + timeout
+        # Loop because failed sends may be rescheduled while closing.
+        while self._tasks:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                print(
+                    f"Warning: {len(self._tasks)} Anilist progress updates were not sent before shutdown."
+                )
+                for task in list(self._tasks.values()):
+                    task.cancel()
+                return
+            await asyncio.wait(list(self._tasks.values()), timeout=remaining)
+
+
+progress_writer = ProgressWriter(
+    debounce=settings.ANILIST_PROGRESS_DEBOUNCE,
+    max_delay=settings.ANILIST_PROGRESS_MAX_DELAY,
+)
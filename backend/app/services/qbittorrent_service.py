@@ -1,293 +1,586 @@
-import qbittorrentapi
+import asyncio
+import httpx
 import urllib.parse
-import time
+from dataclasses import dataclass
 from typing import Optional
 from fastapi import HTTPException, status
 
+from app.core.bencode import BencodeError, torrent_info_hash
 from app.core.config import settings
-from app.schemas.torrent import TorrentInfo
-
-_qbt_client: Optional[qbittorrentapi.Client] = None
-_qbt_connection_error = None
-
-try:
-    _qbt_client = qbittorrentapi.Client(
-        host=settings.QBITTORRENT_HOST,
-        username=settings.QBITTORRENT_USER,
-        password=settings.QBITTORRENT_PASS,
-        REQUESTS_ARGS={"timeout": (10, 30)},
-    )
-    _qbt_client.auth_log_in()
-    print(
-        f"Successfully connected to qBittorrent v{_qbt_client.app.version} at {settings.QBITTORRENT_HOST}"
-    )
-except (qbittorrentapi.LoginFailed, qbittorrentapi.APIError, Exception) as e:
-    print(f"FATAL: Failed to connect/login to qBittorrent on startup: {e}")
-    _qbt_connection_error = e
-    _qbt_client = None
-
-
-def _get_client() -> qbittorrentapi.Client:
-    """Gets the connected client instance or raises an error if unavailable."""
-    if _qbt_client:
-        return _qbt_client
-    else:
-        detail = f"qBittorrent client not available. Connection failed on startup: {_qbt_connection_error}"
-        print(detail)
-        raise HTTPException(
-            status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=detail
-        )
+from app.core.http import create_http_client
+from app.core.singleflight import SingleFlight
+
+# qBittorrent v5 renamed pause/resume to stop/start; the old endpoints return 404 there.
+_ACTION_FALLBACKS = {"pause": "stop", "resume": "start"}
+MAX_TORRENT_FILE_SIZE = 10 * 1024 * 1024
+_HEX_DIGITS = frozenset("0123456789abcdefABCDEF")
+# qBittorrent torrent states to the status shown to users; others are capitalized.
+STATUS_MAP = {
+    "error": "Error",
+    "missingFiles": "Missing Files",
+    "uploading": "Seeding",
+    "pausedUP": "Paused Upload",
+    "queuedUP": "Queued Upload",
+    "stalledUP": "Stalled Upload",
+    "checkingUP": "Checking Upload",
+    "forcedUP": "Forced Upload",
+    "allocating": "Allocating",
+    "downloading": "Downloading",
+    "metaDL": "Fetching Metadata",
+    "pausedDL": "Paused Download",
+    "queuedDL": "Queued Download",
+    "stalledDL": "Stalled Download",
+    "checkingDL": "Checking Download",
+    "forcedDL": "Forced Download",
+    "checkingResumeData": "Checking Resume Data",
+    "moving": "Moving",
+    "unknown": "Unknown",
+}
+TORRENTS_INFO_CHUNK = 100  # hashes per torrents/info request (~4 KB of query string)
+
+# Raw qBittorrent states behind each list filter, mirroring qBittorrent's own filters
+# ('paused*' are called 'stopped*' since v5).
+STATE_FILTERS: dict[str, frozenset[str]] = {
+    "downloading": frozenset(
+        {
+            "downloading",
+            "metaDL",
+            "forcedMetaDL",
+            "stalledDL",
+            "checkingDL",
+            "pausedDL",
+            "stoppedDL",
+            "queuedDL",
+            "forcedDL",
+        }
+    ),
+    "seeding": frozenset(
+        {"uploading", "stalledUP", "checkingUP", "queuedUP", "forcedUP"}
+    ),
+    "completed": frozenset(
+        {
+            "uploading",
+            "stalledUP",
+            "checkingUP",
+            "pausedUP",
+            "stoppedUP",
+            "queuedUP",
+            "forcedUP",
+        }
+    ),
+    "paused": frozenset({"pausedDL", "pausedUP", "stoppedDL", "stoppedUP"}),
+    "stalled": frozenset({"stalledDL", "stalledUP"}),
+    "errored": frozenset({"error", "missingFiles"}),
+}
+
+
+_MAGNET_TRACKERS = (
+    "udp://tracker.openbittorrent.com:6969/announce",
+    "udp://tracker.opentrackr.org:1337/announce",
+)
+
+
+def _hash_magnet(info_hash: str) -> str:
+    """Builds a magnet link for a bare info hash, with a few public trackers."""
+    trackers = "".join(f"&tr={urllib.parse.quote(tr)}" for tr in _MAGNET_TRACKERS)
+    return f"magnet:?xt=urn:btih:{info_hash}{trackers}"
+
+
+def source_info_hash(source: str) -> Optional[str]:
+    """
+    Returns the lowercase info hash of a magnet link or bare 40-char hex hash, or
+    None if it cannot be known without downloading (e.g. a .torrent URL).
+    """
+    if source.startswith("magnet:?"):
+        start = source.find("xt=urn:btih:")
+        if start == -1:
+            return None
+        start += len("xt=urn:btih:")
+        end = source.find("&", start)
+        return source[start : end if end != -1 else None].lower() or None
+    if len(source) == 40 and all(c in _HEX_DIGITS for c in source):
+        return source.lower()
+    return None
+
+
+@dataclass(frozen=True, slots=True)
+class TorrentSource:
+    """A torrent source ready for torrents/add: magnet URLs or a downloaded file."""
+
+    source: str
+    info_hash: Optional[str]  # None if the magnet link carries no btih
+    urls: tuple[str, ...] = ()
+    file: Optional[tuple[str, bytes]] = None  # (filename, .torrent contents)
 
 
 class QBittorrentService:
     """
-    Service to interact with qBittorrent using the SYNCHRONOUS 'python-qbittorrentapi' library.
-    Methods here are synchronous and should be called via 'run_in_executor' from async code.
+    Async service to interact with the qBittorrent Web API (v2) over a pooled
+    'httpx.AsyncClient'. The SID cookie obtained at login lives in the client's cookie
+    jar and is reused by every request; when qBittorrent rejects it (403) the service
+    logs in again once and retries the request.
     """
 
-    def add_torrent_source(
+    def __init__(self, host: str, username: Optional[str], password: Optional[str]):
+        self.host = host.rstrip("/")
+        self.username = username
+        self.password = password
+        self._client: Optional[httpx.AsyncClient] = None
+        self._download_client: Optional[httpx.AsyncClient] = None
+        self._login_lock = asyncio.Lock()
+        self._session_generation = 0
+        self._logged_in = False
+        self._action_names: dict[str, str] = {}
+        # Concurrent identical reads share one request.
+        self._read_flight: SingleFlight = SingleFlight("qbittorrent_read")
+
+    def _get_client(self) -> httpx.AsyncClient:
+        """Returns the shared client, creating it on first use."""
+        if self._client is None or self._client.is_closed:
+            self._client = create_http_client(
+                "qbittorrent",
+                base_url=f"{self.host}/api/v2",
+                headers={"Referer": self.host},
+                timeout=httpx.Timeout(30.0, connect=10.0),
+            )
+        return self._client
+
+    def _get_download_client(self) -> httpx.AsyncClient:
+        """Returns the shared client used to fetch .torrent files from trackers/indexers."""
+        if self._download_client is None or self._download_client.is_closed:
+            self._download_client = create_http_client(
+                "torrent_files", follow_redirects=True
+            )
+        return self._download_client
+
+    async def start(self):
+        """Logs in eagerly so configuration problems show up at startup."""
+        try:
+            response = await self._request("GET", "/app/version")
+            print(
+                f"Successfully connected to qBittorrent {response.text} at {self.host}"
+            )
+        except HTTPException as e:
+            print(
+                f"WARNING: Failed to connect/login to qBittorrent on startup: {e.detail}"
+            )
+
+    async def close(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+        if self._download_client is not None:
+            await self._download_client.aclose()
+            self._download_client = None
+        self._logged_in = False
+
+    async def _login(self, seen_generation: int):
+        """
+        Logs in and stores the SID cookie. Concurrent callers that saw the same expired
+        session wait on the lock and reuse the session created by the first one.
+        """
+        async with self._login_lock:
+            if self._logged_in and self._session_generation != seen_generation:
+                return
+            if not self.username:
+                # Authentication bypass (e.g. whitelisted subnet): nothing to do.
+                self._logged_in = True
+                return
+
+            client = self._get_client()
+            try:
+                response = await client.post(
+                    "/auth/login",
+                    data={"username": self.username, "password": self.password or ""},
+                )
+            except httpx.RequestError as exc:
+                print(f"qbt: Could not connect to qBittorrent for login: {exc}")
+                raise HTTPException(
+                    status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                    detail="Could not connect to qBittorrent.",
+                )
+            if response.status_code == 403:
+                raise HTTPException(
+                    status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                    detail="qBittorrent login refused: too many failed attempts, IP is banned.",
+                )
+            if response.status_code != 200 or response.text.strip() != "Ok.":
+                raise HTTPException(
+                    status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                    detail="qBittorrent login failed. Check QBITTORRENT_USER/QBITTORRENT_PASS.",
+                )
+            self._session_generation += 1
+            self._logged_in = True
+            print("qbt: Logged in to qBittorrent.")
+
+    async def _request(
         self,
-        source: str,
+        method: str,
+        path: str,
+        passthrough_statuses: tuple[int, ...] = (),
+        **kwargs,
+    ) -> httpx.Response:
+        """
+        Sends a request with the current session, re-logging in once on 403.
+        Raises HTTPException for connection errors and unexpected error statuses;
+        statuses in `passthrough_statuses` are returned for the caller to handle.
+        """
+        client = self._get_client()
+        generation = self._session_generation
+        if not self._logged_in:
+            await self._login(generation)
+            generation = self._session_generation
+
+        try:
+            response = await client.request(method, path, **kwargs)
+            if response.status_code == 403:
+                await self._login(generation)
+                response = await client.request(method, path, **kwargs)
+        except httpx.RequestError as exc:
+            print(f"qbt: Error while requesting {path}: {exc}")
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Could not connect to qBittorrent.",
+            )
+
+        if (
+            response.status_code >= 400
+            and response.status_code not in passthrough_statuses
+        ):
+            print(
+                f"qbt: HTTP {response.status_code} from {path}: {response.text[:200]}"
+            )
+            raise HTTPException(
+                status_code=status.HTTP_502_BAD_GATEWAY,
+                detail=f"qBittorrent API returned status {response.status_code}",
+            )
+        return response
+
+    async def resolve_source(self, source: str) -> TorrentSource:
+        """
+        Works out how to add a torrent source and, where possible, its info hash.
+        .torrent URLs are downloaded here so their hash is known before the add.
+        """
+        if source.startswith("magnet:?"):
+            return TorrentSource(source, source_info_hash(source), urls=(source,))
+        if source.startswith(("http://", "https://")) and source.endswith(".torrent"):
+            torrent_bytes = await self._fetch_torrent_file(source)
+            try:
+                info_hash = torrent_info_hash(torrent_bytes)
+            except BencodeError as e:
+                raise ValueError(f"Downloaded file is not a valid torrent: {e}")
+            filename = source.rsplit("/", 1)[-1]
+            return TorrentSource(source, info_hash, file=(filename, torrent_bytes))
+        if len(source) == 40 and all(c in _HEX_DIGITS for c in source):
+            info_hash = source.lower()
+            return TorrentSource(source, info_hash, urls=(_hash_magnet(info_hash),))
+        raise ValueError("Invalid torrent source provided.")
+
+    async def add_torrent_source(
+        self,
+        source: str | TorrentSource,
         save_path: Optional[str] = None,
         category: Optional[str] = None,
         tags: Optional[list[str]] = None,
         paused: bool = False,
     ) -> Optional[str]:
         """
-        Adds a torrent from various sources. SYNCHRONOUS.
-        Returns the info_hash if successfully added/found. Hash retrieval is unreliable for URL adds.
+        Adds a torrent from a magnet link, .torrent URL, info hash or a source already
+        passed through resolve_source. Returns the info_hash if successfully
+        added/found. For .torrent URLs the file is downloaded and uploaded by us, so
+        its hash is computed locally from the info dict.
         """
-        client = _get_client()
-        known_hash = None
-        urls_to_add = []
-        kwargs = {}
+        if isinstance(source, str):
+            source = await self.resolve_source(source)
+        known_hash = source.info_hash
+        files = None
+        data = {}
 
         if save_path:
-            kwargs["save_path"] = save_path
+            data["savepath"] = save_path
         if category:
-            kwargs["category"] = category
+            data["category"] = category
         if tags:
-            kwargs["tags"] = tags
+            data["tags"] = ",".join(tags)
         if paused:
-            kwargs["is_paused"] = True
+            data["paused"] = "true"
+            data["stopped"] = "true"
 
-        if source.startswith("magnet:?"):
-            urls_to_add.append(source)
-            print(f"qbt-sync: Adding magnet link: {source[:50]}...")
-            try:
-                if "xt=urn:btih:" in source:
-                    start = source.find("xt=urn:btih:") + len("xt=urn:btih:")
-                    end = source.find("&", start)
-                    known_hash = source[start : end if end != -1 else None].lower()
-            except Exception:
-                pass
-        elif source.startswith(("http://", "https://")) and source.endswith(".torrent"):
-            urls_to_add.append(source)
-            print(f"qbt-sync: Adding .torrent URL: {source}")
-        elif len(source) == 40 and all(c in "0123456789abcdefABCDEF" for c in source):
-            known_hash = source.lower()
-            magnet_from_hash = f"magnet:?xt=urn:btih:{known_hash}"
-            trackers = [
-                "udp://tracker.openbittorrent.com:6969/announce",
-                "udp://tracker.opentrackr.org:1337/announce",
-            ]
-            for tr in trackers:
-                magnet_from_hash += f"&tr={urllib.parse.quote(tr)}"
-            urls_to_add.append(magnet_from_hash)
-            print(f"qbt-sync: Adding info_hash {known_hash} via constructed magnet...")
+        if source.file:
+            print(f"qbt: Adding .torrent URL: {source.source}")
+            filename, torrent_bytes = source.file
+            files = {"torrents": (filename, torrent_bytes, "application/x-bittorrent")}
+        elif source.urls:
+            print(f"qbt: Adding {source.source[:50]}...")
         else:
-            raise ValueError("Invalid torrent source provided.")
-        if not urls_to_add:
             raise ValueError("Could not determine URL or magnet to add.")
 
-        try:
-            result = client.torrents_add(urls=urls_to_add, **kwargs)
-
-            if result == "Ok.":
-                if known_hash:
-                    print(
-                        f"qbt-sync: Torrent addition initiated for known hash: {known_hash}"
-                    )
-                    return known_hash
-                else:
-                    print(
-                        "qbt-sync: Added by URL, attempting unreliable hash retrieval..."
-                    )
-                    time.sleep(0.75)
-                    torrents = self.get_all_torrents_raw()
-                    if torrents:
-                        latest_torrent = max(torrents, key=lambda t: t.added_on)
-                        print(
-                            f"qbt-sync: Assumed newest torrent hash (unreliable): {latest_torrent.hash}"
-                        )
-                        return latest_torrent.hash
-                    else:
-                        print(
-                            "qbt-sync: Could not retrieve torrent list after adding by URL."
-                        )
-                        return None
-            else:
-                print(f"qbt-sync: Failed to add torrent, API response: {result}")
-                if known_hash:
-                    existing = self.get_torrent_details_raw(known_hash)
-                    if existing:
-                        print(
-                            f"qbt-sync: Torrent with hash {known_hash} appears to already exist."
-                        )
-                        return known_hash
-                return None
+        if known_hash and self._is_present(known_hash):
+            # Another user already has it; adding again would only cost a request.
+            print(
+                f"qbt: Torrent {known_hash} is already in qBittorrent, not re-adding."
+            )
+            return known_hash
+
+        if source.urls:
+            data["urls"] = "\n".join(source.urls)
+        response = await self._request(
+            "POST",
+            "/torrents/add",
+            passthrough_statuses=(409, 415),
+            data=data,
+            files=files,
+        )
+
+        if response.status_code == 409:
+            print(
+                f"qbt: Torrent already exists (Conflict 409): {source.source[:60]}..."
+            )
+            return known_hash
+        if response.status_code == 415:
+            print(
+                f"qbt: qBittorrent rejected torrent source as invalid: {source.source[:60]}"
+            )
+            raise ValueError("qBittorrent rejected the torrent source.")
+
+        if response.text.strip() == "Ok.":
+            print(f"qbt: Torrent addition initiated for known hash: {known_hash}")
+            return known_hash
 
-        except qbittorrentapi.Conflict409Error:
-            print(f"qbt-sync: Torrent already exists (Conflict 409): {source[:60]}...")
-            if known_hash:
+        print(f"qbt: Failed to add torrent, API response: {response.text}")
+        if known_hash:
+            # Ask qBittorrent itself: the state cache may not have seen a torrent that
+            # was added a moment ago (qBittorrent 4.x answers duplicates "Fails.").
+            try:
+                existing = await self._fetch_torrents_info(known_hash)
+            except HTTPException as e:
+                print(f"qbt: Error checking for torrent {known_hash}: {e.detail}")
+                existing = None
+            if existing:
+                print(f"qbt: Torrent with hash {known_hash} appears to already exist.")
                 return known_hash
-            return None
-        except qbittorrentapi.APIError as e:
-            print(f"qbt-sync: API error adding torrent: {e}")
-            raise HTTPException(
-                status_code=status.HTTP_502_BAD_GATEWAY,
-                detail=f"qBittorrent API error: {e}",
+        return None
+
+    async def add_info_hashes(self, info_hashes: list[str]) -> list[str]:
+        """
+        Adds several torrents by info hash with a single torrents/add call (one
+        magnet per line), skipping those already in qBittorrent.
+        Returns the lowercase hashes of all requested torrents.
+        """
+        hashes = list(dict.fromkeys(h.lower() for h in info_hashes))
+        invalid = [h for h in hashes if len(h) != 40 or not set(h) <= _HEX_DIGITS]
+        if invalid:
+            raise ValueError(f"Invalid info hashes: {', '.join(invalid)}")
+
+        missing = [h for h in hashes if not self._is_present(h)]
+        if not missing:
+            print(f"qbt: All {len(hashes)} torrents are already in qBittorrent.")
+            return hashes
+
+        response = await self._request(
+            "POST",
+            "/torrents/add",
+            passthrough_statuses=(409, 415),
+            data={"urls": "\n".join(_hash_magnet(h) for h in missing)},
+        )
+        if response.status_code == 415:
+            raise ValueError("qBittorrent rejected the torrent sources.")
+        if response.status_code == 409 or response.text.strip() != "Ok.":
+            # qBittorrent reports failure when none were new, e.g. all added meanwhile.
+            print(
+                f"qbt: torrents/add answered '{response.text.strip()}' for {len(missing)} hashes; they may already exist."
             )
-        except Exception as e:
-            print(f"qbt-sync: Unexpected error adding torrent: {e}")
-            raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail=f"Internal error interacting with qBittorrent: {e}",
+        else:
+            print(
+                f"qbt: Added {len(missing)} torrents in one request ({len(hashes) - len(missing)} already present)."
             )
+        return hashes
+
+    def _is_present(self, info_hash: str) -> bool:
+        """True if the (recently synced) torrent state cache has this torrent."""
+        from app.services.torrent_state_cache import torrent_state_cache
 
-    def get_all_torrents_raw(self) -> list[qbittorrentapi.TorrentDictionary]:
-        """Gets raw torrent data from qBittorrent. SYNCHRONOUS."""
-        client = _get_client()
+        return (
+            torrent_state_cache.is_synced
+            and torrent_state_cache.get(info_hash) is not None
+        )
+
+    async def _fetch_torrent_file(self, url: str) -> bytes:
+        """Downloads a .torrent file, refusing anything larger than MAX_TORRENT_FILE_SIZE."""
         try:
-            return client.torrents_info()
-        except qbittorrentapi.APIError as e:
-            print(f"qbt-sync: API error getting torrents: {e}")
+            client = self._get_download_client()
+            async with client.stream("GET", url, timeout=20.0) as response:
+                response.raise_for_status()
+                chunks = []
+                received = 0
+                async for chunk in response.aiter_bytes():
+                    received += len(chunk)
+                    if received > MAX_TORRENT_FILE_SIZE:
+                        raise ValueError(
+                            f"Torrent file at {url} exceeds {MAX_TORRENT_FILE_SIZE} bytes."
+                        )
+                    chunks.append(chunk)
+                return b"".join(chunks)
+        except httpx.RequestError as exc:
+            print(f"qbt: Failed to download torrent file {url}: {exc}")
             raise HTTPException(
-                status_code=status.HTTP_502_BAD_gateway,
-                detail=f"qBittorrent API error: {e}",
+                status_code=status.HTTP_502_BAD_GATEWAY,
+                detail="Could not download the .torrent file.",
+            )
+        except httpx.HTTPStatusError as exc:
+            print(
+                f"qbt: Torrent file download returned HTTP {exc.response.status_code}: {url}"
             )
-        except Exception as e:
-            print(f"qbt-sync: Unexpected error getting torrents: {e}")
             raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail=f"Internal error interacting with qBittorrent: {e}",
+                status_code=status.HTTP_502_BAD_GATEWAY,
+                detail=f"Torrent file download returned status {exc.response.status_code}",
             )
 
-    def get_torrent_details_raw(
-        self, info_hash: str
-    ) -> Optional[qbittorrentapi.TorrentDictionary]:
-        """Gets raw details for a single torrent by hash. SYNCHRONOUS."""
-        client = _get_client()
+    async def get_torrents_raw(self, info_hashes: list[str]) -> list[dict]:
+        """
+        Gets raw torrent data for just the given hashes. Hashes are sent in chunks of
+        TORRENTS_INFO_CHUNK so the query string stays bounded; chunks run concurrently.
+        """
+        chunks = [
+            "|".join(info_hashes[i : i + TORRENTS_INFO_CHUNK])
+            for i in range(0, len(info_hashes), TORRENTS_INFO_CHUNK)
+        ]
+        results = await asyncio.gather(
+            *(
+                self._read_flight.do(
+                    ("info", chunk),
+                    lambda chunk=chunk: self._fetch_torrents_info(chunk),
+                )
+                for chunk in chunks
+            )
+        )
+        return [torrent for chunk in results for torrent in chunk]
+
+    async def _fetch_torrents_info(self, hashes: Optional[str] = None) -> list[dict]:
+        params = {"hashes": hashes} if hashes else None
+        response = await self._request("GET", "/torrents/info", params=params)
+        return response.json()
+
+    async def sync_maindata(self, rid: int = 0) -> dict:
+        """Gets the sync/maindata delta since response id `rid` (0 = full state)."""
+        return await self._read_flight.do(
+            ("maindata", rid), lambda: self._fetch_maindata(rid)
+        )
+
+    async def _fetch_maindata(self, rid: int) -> dict:
+        response = await self._request("GET", "/sync/maindata", params={"rid": rid})
+        return response.json()
+
+    async def get_torrent_details_raw(self, info_hash: str) -> Optional[dict]:
+        """
+        Gets raw details for a single torrent by hash.
+        Served from the torrent state cache when it is in sync.
+        """
+        from app.services.torrent_state_cache import torrent_state_cache
+
+        if torrent_state_cache.is_synced:
+            return torrent_state_cache.get(info_hash)
+
         try:
-            results = client.torrents_info(torrent_hashes=info_hash)
+            results = await self._read_flight.do(
+                ("info", info_hash), lambda: self._fetch_torrents_info(info_hash)
+            )
             return results[0] if results else None
-        except qbittorrentapi.NotFound404Error:
-            print(f"qbt-sync: Torrent {info_hash} not found (404).")
-            return None
-        except qbittorrentapi.APIError as e:
-            print(f"qbt-sync: API error getting torrent {info_hash}: {e}")
+        except HTTPException as e:
+            print(f"qbt: Error getting torrent {info_hash}: {e.detail}")
             return None
         except Exception as e:
-            print(f"qbt-sync: Unexpected error getting torrent {info_hash}: {e}")
+            print(f"qbt: Unexpected error getting torrent {info_hash}: {e}")
             return None
 
-    def map_torrent_info(
-        self, torrent_dict: qbittorrentapi.TorrentDictionary
-    ) -> TorrentInfo:
-        """Maps qbittorrentapi TorrentDictionary to our Pydantic schema."""
+    def torrent_info_dict(self, torrent_dict: dict) -> dict:
+        """
+        Maps a qBittorrent torrent dict (API or state cache entry) to a plain dict with
+        the TorrentInfo fields, ready for JSON encoding without building a model.
+        """
         try:
-            state_raw = getattr(torrent_dict, "state", "unknown")
-            state_str = str(state_raw)
-            status_map = {
-                "error": "Error",
-                "missingFiles": "Missing Files",
-                "uploading": "Seeding",
-                "pausedUP": "Paused Upload",
-                "queuedUP": "Queued Upload",
-                "stalledUP": "Stalled Upload",
-                "checkingUP": "Checking Upload",
-                "forcedUP": "Forced Upload",
-                "allocating": "Allocating",
-                "downloading": "Downloading",
-                "metaDL": "Fetching Metadata",
-                "pausedDL": "Paused Download",
-                "queuedDL": "Queued Download",
-                "stalledDL": "Stalled Download",
-                "checkingDL": "Checking Download",
-                "forcedDL": "Forced Download",
-                "checkingResumeData": "Checking Resume Data",
-                "moving": "Moving",
-                "unknown": "Unknown",
+            get = torrent_dict.get
+            state = str(get("state", "unknown"))
+            return {
+                "hash": get("hash", "N/A"),
+                "name": get("name", "N/A"),
+                "size": get("size", 0),
+                "progress": round(get("progress", 0.0) * 100, 2),
+                "status": STATUS_MAP.get(state) or state.capitalize(),
+                "num_seeds": get("num_seeds", 0),
+                "num_leechs": get("num_leechs", 0),
+                "added_on": get("added_on", 0),
             }
-            mapped_status = status_map.get(state_str, state_str.capitalize())
-            progress_val = getattr(torrent_dict, "progress", 0.0) * 100
-
-            return TorrentInfo(
-                hash=getattr(torrent_dict, "hash", "N/A"),
-                name=getattr(torrent_dict, "name", "N/A"),
-                size=getattr(torrent_dict, "size", 0),
-                progress=round(progress_val, 2),
-                status=mapped_status,
-                num_seeds=getattr(torrent_dict, "num_seeds", 0),
-                num_leechs=getattr(torrent_dict, "num_leechs", 0),
-                added_on=getattr(torrent_dict, "added_on", 0),
-            )
         except Exception as e:
             print(
-                f"Error mapping qbt TorrentDictionary to schema: {e} - Data: {torrent_dict}"
+                f"Error mapping qbt torrent dict to schema: {e} - Data: {torrent_dict}"
             )
             raise ValueError(f"Failed to map torrent info: {e}")
 
-    def _manage_torrents(self, action_method_name: str, info_hashes: str | list[str]):
-        """Helper for pause, resume actions. SYNCHRONOUS."""
-        client = _get_client()
-        try:
-            method = getattr(client.torrents, action_method_name)
-            method(torrent_hashes=info_hashes)  # Use torrent_hashes parameter
-        except qbittorrentapi.APIError as e:
-            print(f"qbt-sync: API error during {action_method_name}: {e}")
-            raise HTTPException(
-                status_code=status.HTTP_502_BAD_GATEWAY,
-                detail=f"qBittorrent API error: {e}",
+    async def _manage_torrents(self, action: str, info_hashes: str | list[str]):
+        """Helper for pause, resume actions."""
+        hashes = info_hashes if isinstance(info_hashes, str) else "|".join(info_hashes)
+        endpoint = self._action_names.get(action, action)
+        response = await self._request(
+            "POST",
+            f"/torrents/{endpoint}",
+            passthrough_statuses=(404,),
+            data={"hashes": hashes},
+        )
+        if response.status_code == 404 and action in _ACTION_FALLBACKS:
+            endpoint = _ACTION_FALLBACKS[action]
+            await self._request(
+                "POST", f"/torrents/{endpoint}", data={"hashes": hashes}
             )
-        except Exception as e:
-            print(f"qbt-sync: Unexpected error during {action_method_name}: {e}")
+            self._action_names[action] = endpoint
+        elif response.status_code == 404:
             raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail=f"Internal error interacting with qBittorrent: {e}",
+                status_code=status.HTTP_502_BAD_GATEWAY,
+                detail=f"qBittorrent does not support action '{action}'.",
             )
 
-    def pause_torrent(self, info_hash: str):
-        """Pauses a specific torrent. SYNCHRONOUS."""
-        self._manage_torrents("pause", info_hashes=info_hash)
+    async def pause_torrent(self, info_hash: str):
+        """Pauses a specific torrent."""
+        await self._manage_torrents("pause", info_hashes=info_hash)
 
-    def resume_torrent(self, info_hash: str):
-        """Resumes a specific torrent. SYNCHRONOUS."""
-        self._manage_torrents("resume", info_hashes=info_hash)
+    async def resume_torrent(self, info_hash: str):
+        """Resumes a specific torrent."""
+        await self._manage_torrents("resume", info_hashes=info_hash)
 
-    def delete_torrent(self, info_hash: str, delete_files: bool = False):
-        """Deletes torrent. SYNCHRONOUS."""
-        client = _get_client()
-        try:
-            client.torrents_delete(torrent_hashes=info_hash, delete_files=delete_files)
-        except qbittorrentapi.NotFound404Error:
-            print(f"qbt-sync: Torrent {info_hash} not found for deletion (404).")
+    async def pause_torrents(self, info_hashes: list[str]):
+        """Pauses several torrents with a single API call."""
+        await self._manage_torrents("pause", info_hashes=info_hashes)
+
+    async def resume_torrents(self, info_hashes: list[str]):
+        """Resumes several torrents with a single API call."""
+        await self._manage_torrents("resume", info_hashes=info_hashes)
+
+    async def delete_torrent(self, info_hash: str, delete_files: bool = False):
+        """Deletes torrent."""
+        await self.delete_torrents([info_hash], delete_files=delete_files)
+
+    async def delete_torrents(self, info_hashes: list[str], delete_files: bool = False):
+        """Deletes several torrents with a single API call."""
+        hashes = "|".join(info_hashes)
+        response = await self._request(
+            "POST",
+            "/torrents/delete",
+            passthrough_statuses=(404,),
+            data={
+                "hashes": hashes,
+                "deleteFiles": "true" if delete_files else "false",
+            },
+        )
+        if response.status_code == 404:
+            print(f"qbt: Torrent(s) {hashes} not found for deletion (404).")
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
-                detail=f"Torrent {info_hash} not found for deletion.",
-            )
-        except qbittorrentapi.APIError as e:
-            print(f"qbt-sync: API error deleting torrent: {e}")
-            raise HTTPException(
-                status_code=status.HTTP_502_BAD_GATEWAY,
-                detail=f"qBittorrent API error: {e}",
-            )
-        except Exception as e:
-            print(f"qbt-sync: Unexpected error deleting torrent: {e}")
-            raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail=f"Internal error interacting with qBittorrent: {e}",
+                detail=f"Torrent {hashes} not found for deletion.",
             )
 
 
-qbittorrent_service = QBittorrentService()
+qbittorrent_service = QBittorrentService(
+    host=settings.QBITTORRENT_HOST,
+    username=settings.QBITTORRENT_USER,
+    password=settings.QBITTORRENT_PASS,
+)
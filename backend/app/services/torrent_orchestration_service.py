@@ -1,55 +1,42 @@
+import asyncio
 from fastapi import HTTPException, status
 from typing import Optional
-import asyncio
 
-from app.db.models import User
 from app.services.nyaa_service import nyaa_service, NyaaResult
 from app.services.qbittorrent_service import qbittorrent_service
+from app.services.torrent_ranking import get_features, torrent_ranker
 from app.db.repository.torrent_repo import TorrentRepository
 from app.db.base import AsyncSession
 
+BATCH_SEARCH_CONCURRENCY = 4  # per-episode Nyaa searches run at once by a batch
+
 
 class TorrentOrchestrationService:
 
     def _select_best_torrent(
-        self, results: list[NyaaResult], preferred_quality: str
+        self,
+        results: list[NyaaResult],
+        preferred_quality: str,
+        episode_number: Optional[int] = None,
     ) -> Optional[NyaaResult]:
-        """Selects the 'best' torrent, prioritizing those with an info_hash."""
+        """Selects the highest ranked torrent that has an info_hash."""
         if not results:
             return None
 
-        valid_results = [r for r in results if r.info_hash]
-        if not valid_results:
+        best = torrent_ranker.best(results, preferred_quality, episode=episode_number)
+        if best is None:
             print("No Nyaa results found with a valid info_hash.")
             return None
 
-        quality_filtered = [
-            r for r in valid_results if preferred_quality.lower() in r.title.lower()
-        ]
-
-        if quality_filtered:
-            quality_filtered.sort(key=lambda r: r.seeders or 0, reverse=True)
-            print(
-                f"Found {len(quality_filtered)} results matching quality '{preferred_quality}'. Best: {quality_filtered[0]}"
-            )
-            return quality_filtered[0]
-        else:
-            valid_results.sort(key=lambda r: r.seeders or 0, reverse=True)
-            print(
-                f"No results matching quality '{preferred_quality}'. Falling back to highest seeder: {valid_results[0]}"
-            )
-            return valid_results[0]
-
-    async def download_watchlist_episode(
-        self,
-        db: AsyncSession,
-        user: User,
-        media_title: str,
-        episode_number: int,
-        preferred_quality: str,
-    ) -> str:
-        """Orchestrates the download: searches Nyaa, selects, adds via hash/URL."""
+        print(
+            f"Ranked {len(results)} results for quality '{preferred_quality}'. Best: {best}"
+        )
+        return best
 
+    async def find_episode_torrent(
+        self, media_title: str, episode_number: int, preferred_quality: str
+    ) -> NyaaResult:
+        """Searches Nyaa for an episode and returns the best result (Nyaa only)."""
         query = f"{media_title} - {episode_number:02d}"
         print(f"Searching Nyaa for: '{query} {preferred_quality}'")
         search_results = await nyaa_service.search(f"{query} {preferred_quality}")
@@ -64,7 +51,9 @@ class TorrentOrchestrationService:
                 detail=f"No torrents found on Nyaa for '{query}'.",
             )
 
-        selected_torrent = self._select_best_torrent(search_results, preferred_quality)
+        selected_torrent = self._select_best_torrent(
+            search_results, preferred_quality, episode_number
+        )
 
         if not selected_torrent or not selected_torrent.info_hash:
             raise HTTPException(
@@ -75,56 +64,120 @@ class TorrentOrchestrationService:
         print(
             f"Selected torrent: {selected_torrent.title} (Hash: {selected_torrent.info_hash})"
         )
+        return selected_torrent
+
+    async def find_episode_range_torrents(
+        self, media_title: str, episodes: list[int], preferred_quality: str
+    ) -> tuple[list[tuple[NyaaResult, list[int]]], list[int]]:
+        """
+        Finds torrents for several episodes of a show with as few Nyaa searches as
+        possible. One show-wide search comes first: a batch/season release covering
+        the whole range wins, otherwise single-episode releases from it are used.
+        Episodes it did not return are searched individually, concurrently.
+
+        Returns ([(torrent, episodes it provides)], episodes with no torrent found).
+        """
+        first, last = min(episodes), max(episodes)
+        print(f"Searching Nyaa for episodes {first}-{last} of '{media_title}'")
+        results = await nyaa_service.search(f"{media_title} {preferred_quality}")
+        if not results:
+            results = await nyaa_service.search(media_title)
 
-        source_to_add = selected_torrent.info_hash
+        covering = [
+            r
+            for r in results
+            if get_features(r).is_batch and get_features(r).covers(first, last)
+        ]
+        batch = torrent_ranker.best(covering, preferred_quality)
+        if batch is not None:
+            print(f"Selected batch torrent: {batch.title} (Hash: {batch.info_hash})")
+            return [(batch, list(episodes))], []
+
+        picks: dict[int, NyaaResult] = {}
+        for episode in episodes:
+            singles = [
+                r
+                for r in results
+                if not get_features(r).is_batch and get_features(r).episode == episode
+            ]
+            best = torrent_ranker.best(singles, preferred_quality, episode=episode)
+            if best is not None:
+                picks[episode] = best
+
+        remaining = [e for e in episodes if e not in picks]
+        limit = asyncio.Semaphore(BATCH_SEARCH_CONCURRENCY)
+
+        async def search_episode(episode: int) -> NyaaResult:
+            async with limit:
+                return await self.find_episode_torrent(
+                    media_title, episode, preferred_quality
+                )
 
-        print(
-            f"qbt-sync: Calling add_torrent_source in executor for hash {source_to_add}..."
+        found = await asyncio.gather(
+            *(search_episode(e) for e in remaining), return_exceptions=True
         )
+        missing = []
+        for episode, result in zip(remaining, found):
+            if isinstance(result, HTTPException) and result.status_code == 404:
+                missing.append(episode)
+            elif isinstance(result, BaseException):
+                raise result
+            else:
+                picks[episode] = result
+
+        # A per-episode search may pick a partial batch; group episodes per torrent.
+        by_hash: dict[str, tuple[NyaaResult, list[int]]] = {}
+        for episode in episodes:
+            torrent = picks.get(episode)
+            if torrent is not None:
+                by_hash.setdefault(torrent.info_hash.lower(), (torrent, []))[1].append(
+                    episode
+                )
+        return list(by_hash.values()), missing
+
+    async def add_and_link_many(
+        self, db: AsyncSession, user_id: int, selected_torrents: list[NyaaResult]
+    ) -> list[str]:
+        """
+        Adds several torrents with one qBittorrent call and links them to the user
+        with one insert. The hashes stay locked until the caller commits.
+        """
+        torrent_repo = TorrentRepository(db)
+        hashes = [t.info_hash.lower() for t in selected_torrents]
+        await torrent_repo.lock_torrent_hashes(hashes)
         try:
-            loop = asyncio.get_running_loop()
-            torrent_hash_from_qbit = await loop.run_in_executor(
-                None,
-                qbittorrent_service.add_torrent_source,
-                source_to_add,
-            )
-        except (ValueError, HTTPException) as e:
-            print(f"Error during add_torrent_source execution: {e}")
-            if isinstance(e, HTTPException):
-                raise e
+            added = await qbittorrent_service.add_info_hashes(hashes)
+        except ValueError as e:
             raise HTTPException(status_code=400, detail=f"Torrent source error: {e}")
-        except Exception as e:
-            print(f"Error executing qbittorrent add in executor: {e}")
-            raise HTTPException(
-                status_code=500, detail="Error during torrent addition process."
-            )
-
-        if not torrent_hash_from_qbit:
-            raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail="Failed to add torrent to qBittorrent or confirm its hash.",
-            )
-
-        if torrent_hash_from_qbit.lower() != selected_torrent.info_hash.lower():
-            print(
-                f"WARNING: Hash mismatch! Nyaa hash: {selected_torrent.info_hash}, qBit returned: {torrent_hash_from_qbit}. Using qBit hash."
-            )
+        linked = await torrent_repo.link_torrents(user_id, added)
+        print(
+            f"Linked {len(linked)} new torrents to user {user_id} ({len(added) - len(linked)} already linked)."
+        )
+        return added
 
-        final_hash = torrent_hash_from_qbit
+    async def add_and_link(
+        self, db: AsyncSession, user_id: int, selected_torrent: NyaaResult
+    ) -> str:
+        """
+        Adds the selected torrent to qBittorrent (unless another user already has it)
+        and links it to the user. The hash stays locked until the caller commits, so
+        a concurrent delete of the last link cannot remove it in between.
+        """
         torrent_repo = TorrentRepository(db)
+        final_hash = await self._add_locked(torrent_repo, selected_torrent)
         try:
             link = await torrent_repo.link_torrent(
-                user_id=user.id, torrent_hash=final_hash
+                user_id=user_id, torrent_hash=final_hash
             )
             if link:
-                print(f"Successfully linked torrent {final_hash} to user {user.id}")
+                print(f"Successfully linked torrent {final_hash} to user {user_id}")
             else:
                 print(
-                    f"Torrent link for hash {final_hash} and user {user.id} already existed."
+                    f"Torrent link for hash {final_hash} and user {user_id} already existed."
                 )
         except Exception as e:
             print(
-                f"CRITICAL: Failed to link torrent {final_hash} to user {user.id} in DB after adding to qBit: {e}"
+                f"CRITICAL: Failed to link torrent {final_hash} to user {user_id} in DB after adding to qBit: {e}"
             )
             raise HTTPException(
                 status_code=500,
@@ -133,5 +186,63 @@ class TorrentOrchestrationService:
 
         return final_hash
 
+    async def add_and_link_users(
+        self, db: AsyncSession, user_ids: list[int], selected_torrent: NyaaResult
+    ) -> str:
+        """
+        Like add_and_link, but links the torrent to several users at once (e.g. every
+        subscriber of a newly aired episode) with a single insert.
+        """
+        torrent_repo = TorrentRepository(db)
+        final_hash = await self._add_locked(torrent_repo, selected_torrent)
+        try:
+            linked = await torrent_repo.link_torrent_to_users(user_ids, final_hash)
+        except Exception as e:
+            print(
+                f"CRITICAL: Failed to link torrent {final_hash} to users {user_ids} in DB after adding to qBit: {e}"
+            )
+            raise HTTPException(
+                status_code=500,
+                detail=f"Torrent added to qBit (hash: {final_hash}), but DB linking failed.",
+            )
+        print(
+            f"Linked torrent {final_hash} to {len(linked)} of {len(user_ids)} users (others already had it)."
+        )
+        return final_hash
+
+    async def _add_locked(
+        self, torrent_repo: TorrentRepository, selected_torrent: NyaaResult
+    ) -> str:
+        """Locks the torrent's hash and adds it to qBittorrent. Returns qBit's hash."""
+        source_to_add = selected_torrent.info_hash
+        await torrent_repo.lock_torrent_hashes([source_to_add])
+
+        try:
+            torrent_hash_from_qbit = await qbittorrent_service.add_torrent_source(
+                source_to_add
+            )
+        except HTTPException:
+            raise
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=f"Torrent source error: {e}")
+        except Exception as e:
+            print(f"Error during qbittorrent add: {e}")
+            raise HTTPException(
+                status_code=500, detail="Error during torrent addition process."
+            )
+
+        if not torrent_hash_from_qbit:
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail="Failed to add torrent to qBittorrent or confirm its hash.",
+            )
+
+        if torrent_hash_from_qbit.lower() != selected_torrent.info_hash.lower():
+            print(
+                f"WARNING: Hash mismatch! Nyaa hash: {selected_torrent.info_hash}, qBit returned: {torrent_hash_from_qbit}. Using qBit hash."
+            )
+
+        return torrent_hash_from_qbit
+
 
 torrent_orchestration_service = TorrentOrchestrationService()
@@ -0,0 +1,238 @@
+import heapq
+import math
+import re
+from dataclasses import dataclass, fields, replace
+from typing import Iterable, Optional
+
+from app.core.config import settings
+from app.services.nyaa_parser import NyaaResult
+
+_GROUP_RE = re.compile(r"^\s*[\[(]([^\])]+)[\])]")
+_RESOLUTION_RE = re.compile(r"(?<!\d)(2160|1440|1080|720|576|540|480|360)[pi]\b", re.I)
+_4K_RE = re.compile(r"\b(4k|uhd)\b", re.I)
+_CODEC_PATTERNS = (
+    ("hevc", re.compile(r"\b(x265|h\.?265|hevc)\b", re.I)),
+    ("av1", re.compile(r"\bav1\b", re.I)),
+    ("avc", re.compile(r"\b(x264|h\.?264|avc)\b", re.I)),
+)
+_BATCH_RE = re.compile(r"\b(batch|complete)\b", re.I)
+_SEASON_RE = re.compile(r"\b(s\d{1,2}|season\s*\d{1,2})\b", re.I)
+# "Show - 01 ~ 12", "Show 01-12", "[01-24]" (but not resolutions or years)
+_RANGE_RE = re.compile(
+    r"(?:^|[\s\[(])(\d{1,3})(\s*(?:-|~|to)\s*)(\d{1,3})(?=[\s\])]|v\d|$)"
+)
+# "Show - 08", "Show - 08v2", "S01E08", "Episode 8"
+_EPISODE_RES = (
+    re.compile(r"\bS\d{1,2}E(\d{1,4})\b", re.I),
+    re.compile(r"\s-\s(\d{1,4})(?:v\d)?(?=[\s\[(.]|$)"),
+    re.compile(r"\b(?:episode|ep)\.?\s*(\d{1,4})\b", re.I),
+)
+_QUALITY_RE = re.compile(r"(\d{3,4})p", re.I)
+
+
+@dataclass(frozen=True, slots=True)
+class TorrentFeatures:
+    """Structured facts parsed once from a Nyaa result title."""
+
+    title_lower: str
+    group: Optional[str]
+    resolution: Optional[int]
+    codec: Optional[str]
+    is_batch: bool
+    episode: Optional[int]
+    episode_range: Optional[tuple[int, int]]
+
+    def covers(self, first: int, last: int) -> bool:
+        """True if this torrent contains every episode in [first, last]."""
+        if self.episode_range is not None:
+            return self.episode_range[0] <= first and last <= self.episode_range[1]
+        if self.episode is not None:
+            return self.episode == first == last
+        return False
+
+
+def parse_title(title: str) -> TorrentFeatures:
+    group_match = _GROUP_RE.match(title)
+    group = group_match.group(1).strip() if group_match else None
+
+    resolution_match = _RESOLUTION_RE.search(title)
+    if resolution_match:
+        resolution = int(resolution_match.group(1))
+    elif _4K_RE.search(title):
+        resolution = 2160
+    else:
+        resolution = None
+
+    codec = next((name for name, regex in _CODEC_PATTERNS if regex.search(title)), None)
+
+    # Drop the leading release group so numbers inside it are not read as episodes.
+    body = title[group_match.end() :] if group_match else title
+    episode_range = None
+    range_match = _RANGE_RE.search(body)
+    if range_match:
+        first_text, separator, last_text = range_match.groups()
+        first, last = int(first_text), int(last_text)
+        # " - " also separates title and episode ("Show 2 - 08"), so only trust it
+        # between zero-padded numbers of equal width ("01 - 12").
+        spaced_hyphen = separator.strip() == "-" and separator != "-"
+        if first < last and (
+            not spaced_hyphen or len(first_text) == len(last_text) >= 2
+        ):
+            episode_range = (first, last)
+
+    episode = None
+    if episode_range is None:
+        for regex in _EPISODE_RES:
+            episode_match = regex.search(body)
+            if episode_match:
+                episode = int(episode_match.group(1))
+                break
+
+    # Explicit ranges and "Batch"/"Complete" tags, or a season marker without any
+    # episode number (e.g. "Show S02 1080p"), indicate a multi-episode release.
+    is_batch = (
+        episode_range is not None
+        or bool(_BATCH_RE.search(body))
+        or (episode is None and bool(_SEASON_RE.search(body)))
+    )
+
+    return TorrentFeatures(
+        title_lower=title.lower(),
+        group=group,
+        resolution=resolution,
+        codec=codec,
+        is_batch=is_batch,
+        episode=episode,
+        episode_range=episode_range,
+    )
+
+
+def get_features(result: NyaaResult) -> TorrentFeatures:
+    """Returns the parsed title features, parsing at most once per result object."""
+    features = result._features
+    if features is None:
+        features = result._features = parse_title(result.title)
+    return features
+
+
+@dataclass(frozen=True)
+class RankingWeights:
+    quality_match: float = 100.0  # requested resolution / quality string present
+    quality_mismatch_per_step: float = 15.0  # per resolution step away from requested
+    episode_match: float = 60.0  # single-episode release of the wanted episode
+    episode_mismatch: float = 250.0  # single release of a different episode
+    batch_covering: float = 20.0  # batch containing the wanted episode
+    batch_not_covering: float = 200.0  # batch that does not contain it (or unknown)
+    trusted: float = 20.0
+    remake: float = 40.0
+    seeders: float = 12.0  # multiplied by log(1 + seeders)
+    size_per_gib: float = 0.5  # penalty per GiB, a tie-breaker towards smaller files
+    preferred_group: float = 25.0
+    preferred_codec: float = 5.0
+
+    @classmethod
+    def from_settings(cls) -> "RankingWeights":
+        overrides = settings.TORRENT_RANKING_WEIGHTS
+        known = {f.name for f in fields(cls)}
+        unknown = set(overrides) - known
+        if unknown:
+            print(f"Warning: ignoring unknown ranking weights: {sorted(unknown)}")
+        return replace(cls(), **{k: v for k, v in overrides.items() if k in known})
+
+
+_RESOLUTION_STEPS = (360, 480, 540, 576, 720, 1080, 1440, 2160)
+
+
+class TorrentRanker:
+    """
+    Scores Nyaa results from their pre-parsed title features and metadata and picks
+    the best ones with a heap (O(n log k)) instead of sorting the whole feed.
+    """
+
+    def __init__(
+        self,
+        weights: Optional[RankingWeights] = None,
+        preferred_groups: Iterable[str] = (),
+        preferred_codec: Optional[str] = None,
+    ):
+        self.weights = weights or RankingWeights()
+        self.preferred_groups = {g.lower() for g in preferred_groups}
+        self.preferred_codec = preferred_codec.lower() if preferred_codec else None
+
+    def score(
+        self,
+        result: NyaaResult,
+        preferred_quality: str,
+        episode: Optional[int] = None,
+    ) -> float:
+        w = self.weights
+        features = get_features(result)
+        score = 0.0
+
+        wanted_resolution = _QUALITY_RE.fullmatch(preferred_quality.strip())
+        if wanted_resolution and features.resolution is not None:
+            wanted = int(wanted_resolution.group(1))
+            if features.resolution == wanted:
+                score += w.quality_match
+            elif (
+                wanted in _RESOLUTION_STEPS and features.resolution in _RESOLUTION_STEPS
+            ):
+                steps = abs(
+                    _RESOLUTION_STEPS.index(wanted)
+                    - _RESOLUTION_STEPS.index(features.resolution)
+                )
+                score -= w.quality_mismatch_per_step * steps
+        elif preferred_quality.lower() in features.title_lower:
+            score += w.quality_match
+
+        if episode is not None:
+            if features.is_batch:
+                if features.covers(episode, episode):
+                    score += w.batch_covering
+                else:
+                    score -= w.batch_not_covering
+            elif features.episode == episode:
+                score += w.episode_match
+            elif features.episode is not None:
+                score -= w.episode_mismatch
+
+        if result.trusted:
+            score += w.trusted
+        if result.remake:
+            score -= w.remake
+        score += w.seeders * math.log1p(result.seeders)
+        score -= w.size_per_gib * result.size / 1024**3
+        if features.group and features.group.lower() in self.preferred_groups:
+            score += w.preferred_group
+        if self.preferred_codec and features.codec == self.preferred_codec:
+            score += w.preferred_codec
+        return score
+
+    def top(
+        self,
+        results: Iterable[NyaaResult],
+        preferred_quality: str,
+        episode: Optional[int] = None,
+        n: int = 1,
+    ) -> list[NyaaResult]:
+        """Returns up to `n` best results that have an info_hash, best first."""
+        candidates = (r for r in results if r.info_hash)
+        return heapq.nlargest(
+            n, candidates, key=lambda r: self.score(r, preferred_quality, episode)
+        )
+
+    def best(
+        self,
+        results: Iterable[NyaaResult],
+        preferred_quality: str,
+        episode: Optional[int] = None,
+    ) -> Optional[NyaaResult]:
+        top = self.top(results, preferred_quality, episode, n=1)
+        return top[0] if top else None
+
+
+torrent_ranker = TorrentRanker(
+    weights=RankingWeights.from_settings(),
+    preferred_groups=settings.TORRENT_PREFERRED_GROUPS,
+    preferred_codec=settings.TORRENT_PREFERRED_CODEC,
+)
@@ -0,0 +1,208 @@
+import asyncio
+import time
+from typing import Iterable, Optional
+
+from app.core.config import settings
+from app.services.qbittorrent_service import qbittorrent_service
+
+
+class TorrentSubscription:
+    """
+    Change notifications for a fixed set of torrent hashes. Changes are coalesced
+    into sets until the consumer reads them, so a slow consumer never queues more
+    than one entry per torrent.
+    """
+
+    def __init__(self, info_hashes: set[str]):
+        self.info_hashes = info_hashes
+        self._changed: set[str] = set()
+        self._removed: set[str] = set()
+        self._event = asyncio.Event()
+
+    def _notify(self, changed: set[str], removed: set[str]) -> None:
+        changed = changed & self.info_hashes
+        removed = removed & self.info_hashes
+        if not changed and not removed:
+            return
+        self._changed |= changed
+        self._changed -= removed
+        self._removed |= removed
+        self._event.set()
+
+    async def wait(self, timeout: float) -> tuple[set[str], set[str]]:
+        """
+        Waits up to `timeout` seconds for changes and returns (changed, removed).
+        Both sets are empty if nothing happened in time.
+        """
+        try:
+            await asyncio.wait_for(self._event.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+        self._event.clear()
+        changed, removed = self._changed, self._removed
+        self._changed, self._removed = set(), set()
+        return changed, removed
+
+
+class TorrentStateCache:
+    """
+    In-process mirror of qBittorrent's torrent list, kept current through the
+    rid-based 'sync/maindata' API. After the first full snapshot every refresh only
+    transfers the torrents that changed since the last response id.
+
+    Every change, addition or removal stamps the torrent with the current
+    `generation`, so version_of() tells cheaply whether a set of torrents changed.
+
+    A background task refreshes the cache every `interval` seconds. Readers that find
+    the cache older than `max_staleness` (e.g. the task is not running yet) refresh it
+    inline, so the cache never serves data older than that.
+    """
+
+    def __init__(self, interval: float, max_staleness: float):
+        self.interval = interval
+        self.max_staleness = max_staleness
+        self._torrents: dict[str, dict] = {}
+        # Generation of each torrent's last change; removed torrents are kept until
+        # the next full update so their removal still shows up as a change.
+        self._versions: dict[str, int] = {}
+        self.generation = 0
+        self._rid = 0
+        self._last_sync: Optional[float] = None
+        self._lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self._subscriptions: set[TorrentSubscription] = set()
+
+    @property
+    def is_synced(self) -> bool:
+        """True if the cache was refreshed within the last `max_staleness` seconds."""
+        return (
+            self._last_sync is not None
+            and time.monotonic() - self._last_sync <= self.max_staleness
+        )
+
+    def _apply(self, data: dict) -> None:
+        """Merges a sync/maindata response into the cached state and notifies subscribers."""
+        torrents_delta = data.get("torrents") or {}
+        removed = set(data.get("torrents_removed") or [])
+        if torrents_delta or removed or data.get("full_update"):
+            self.generation += 1
+        if data.get("full_update"):
+            removed |= self._torrents.keys() - torrents_delta.keys()
+            self._torrents = {}
+            self._versions = {}
+
+        for info_hash, changes in torrents_delta.items():
+            entry = self._torrents.get(info_hash)
+            if entry is None:
+                entry = {"hash": info_hash}
+                self._torrents[info_hash] = entry
+            entry.update(changes)
+            self._versions[info_hash] = self.generation
+
+        for info_hash in removed:
+            self._torrents.pop(info_hash, None)
+            self._versions[info_hash] = self.generation
+
+        self._rid = data.get("rid", self._rid)
+
+        if self._subscriptions and (torrents_delta or removed):
+            changed = set(torrents_delta)
+            for subscription in self._subscriptions:
+                subscription._notify(changed, removed)
+
+    async def _refresh_locked(self) -> None:
+        try:
+            data = await qbittorrent_service.sync_maindata(self._rid)
+        except Exception:
+            # The server may have dropped our rid; start over with a full snapshot.
+            self._rid = 0
+            raise
+        self._apply(data)
+        self._last_sync = time.monotonic()
+
+    async def ensure_synced(self) -> None:
+        """Refreshes the cache inline if it is stale."""
+        if self.is_synced:
+            return
+        async with self._lock:
+            if self.is_synced:
+                return
+            await self._refresh_locked()
+
+    async def get_all(self) -> list[dict]:
+        """Returns every torrent known to qBittorrent."""
+        await self.ensure_synced()
+        return list(self._torrents.values())
+
+    async def get_many(self, info_hashes: Iterable[str]) -> list[dict]:
+        """Returns the cached torrents for the given hashes, skipping unknown ones."""
+        await self.ensure_synced()
+        torrents = self._torrents
+        return [torrents[h] for h in info_hashes if h in torrents]
+
+    def version_of(self, info_hashes: Iterable[str]) -> int:
+        """Generation of the latest change to any of the given torrents (0 if none)."""
+        versions = self._versions
+        return max((versions.get(h, 0) for h in info_hashes), default=0)
+
+    def get(self, info_hash: str) -> Optional[dict]:
+        """Returns a single cached torrent without refreshing."""
+        return self._torrents.get(info_hash)
+
+    def discard(self, info_hashes: Iterable[str]) -> None:
+        """
+        Drops torrents we just deleted from qBittorrent, so nobody sees them as
+        present until the next sync confirms the removal.
+        """
+        removed = {h for h in info_hashes if self._torrents.pop(h, None) is not None}
+        if removed:
+            self.generation += 1
+            for info_hash in removed:
+                self._versions[info_hash] = self.generation
+            for subscription in self._subscriptions:
+                subscription._notify(set(), removed)
+
+    def subscribe(self, info_hashes: Iterable[str]) -> TorrentSubscription:
+        """
+        Registers interest in changes to the given torrents. All subscriptions are fed
+        by the single background sync, however many clients are connected.
+        """
+        subscription = TorrentSubscription(set(info_hashes))
+        self._subscriptions.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: TorrentSubscription) -> None:
+        self._subscriptions.discard(subscription)
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                async with self._lock:
+                    await self._refresh_locked()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"qbt-cache: Sync with qBittorrent failed: {e}")
+            await asyncio.sleep(self.interval)
+
+    def start(self) -> None:
+        """Starts the background sync task."""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+            print(f"qbt-cache: Background sync started (every {self.interval}s).")
+
+    async def stop(self) -> None:
+        """Stops the background sync task."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+torrent_state_cache = TorrentStateCache(
+    interval=settings.QBITTORRENT_SYNC_INTERVAL,
+    max_staleness=settings.QBITTORRENT_SYNC_MAX_STALENESS,
+)
@@ -0,0 +1,131 @@
+"""
+Compares NyaaFeedParser against feedparser on Nyaa RSS feeds.
+
+Usage (from the backend folder):
+    python benchmarks/nyaa_parser_bench.py                   # synthetic 75-item feed
+    python benchmarks/nyaa_parser_bench.py feed1.xml ...     # recorded feeds
+    python benchmarks/nyaa_parser_bench.py --record "frieren 1080p" > feed.xml
+
+Both sides produce NyaaResult-equivalent records, so the numbers include building
+the results, not just tokenizing XML.
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import feedparser
+import httpx
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from app.services.nyaa_parser import NyaaResult, parse_feed, parse_size  # noqa: E402
+
+ITEM_TEMPLATE = """<item>
+<title>[SubsPlease] Some Show - {ep:02d} (1080p) [{crc:08X}].mkv</title>
+<link>https://nyaa.si/download/{id}.torrent</link>
+<guid isPermaLink="true">https://nyaa.si/view/{id}</guid>
+<pubDate>Sat, 19 Apr 2025 15:02:12 -0000</pubDate>
+<nyaa:seeders>{seeders}</nyaa:seeders>
+<nyaa:leechers>12</nyaa:leechers>
+<nyaa:downloads>3456</nyaa:downloads>
+<nyaa:infoHash>{hash}</nyaa:infoHash>
+<nyaa:categoryId>1_2</nyaa:categoryId>
+<nyaa:category>Anime - English-translated</nyaa:category>
+<nyaa:size>1.4 GiB</nyaa:size>
+<nyaa:comments>0</nyaa:comments>
+<nyaa:trusted>Yes</nyaa:trusted>
+<nyaa:remake>No</nyaa:remake>
+<description><![CDATA[<a href="https://nyaa.si/view/{id}">#{id} | Some Show</a> | 1.4 GiB | Anime - English-translated | {hash}]]></description>
+</item>
+"""
+
+
+def synthetic_feed(items: int = 75) -> bytes:
+    body = "".join(
+        ITEM_TEMPLATE.format(
+            ep=i % 24 + 1,
+            crc=i * 2654435761 % 2**32,
+            id=1900000 + i,
+            seeders=i * 7 % 500,
+            hash=f"{i:040x}",
+        )
+        for i in range(items)
+    )
+    return (
+        '<?xml version="1.0" encoding="utf-8"?>\n'
+        '<rss xmlns:atom="http://www.w3.org/2005/Atom" '
+        'xmlns:nyaa="https://nyaa.si/xmlns/nyaa" version="2.0">\n'
+        "<channel><title>Nyaa - Home - Torrent File RSS</title>"
+        "<description>RSS Feed for Home</description>"
+        "<link>https://nyaa.si/</link>\n"
+        f"{body}</channel></rss>\n"
+    ).encode()
+
+
+def parse_with_feedparser(data: bytes) -> list[NyaaResult]:
+    """The previous implementation: feedparser plus per-entry dict lookups."""
+    feed = feedparser.parse(data)
+    return [
+        NyaaResult(
+            title=entry.get("title", "N/A"),
+            torrent_file_url=entry.get("link"),
+            info_hash=entry.get("nyaa_infohash"),
+            guid=entry.get("guid"),
+            pubDate=entry.get("published"),
+            seeders=int(entry.get("nyaa_seeders") or 0),
+            leechers=int(entry.get("nyaa_leechers") or 0),
+            downloads=int(entry.get("nyaa_downloads") or 0),
+            size=parse_size(entry.get("nyaa_size")),
+            category=entry.get("nyaa_category"),
+            trusted=entry.get("nyaa_trusted", "").lower() == "yes",
+            remake=entry.get("nyaa_remake", "").lower() == "yes",
+        )
+        for entry in feed.entries
+    ]
+
+
+def bench(fn, data: bytes, min_time: float = 1.0) -> tuple[float, int]:
+    """Returns (seconds per call, items parsed)."""
+    items = len(fn(data))
+    runs = 0
+    start = time.perf_counter()
+    while time.perf_counter() - start < min_time:
+        fn(data)
+        runs += 1
+    return (time.perf_counter() - start) / runs, items
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("feeds", nargs="*", help="Recorded Nyaa RSS files")
+    parser.add_argument("--record", metavar="QUERY", help="Print a live feed and exit")
+    parser.add_argument("--items", type=int, default=75, help="Synthetic feed size")
+    args = parser.parse_args()
+
+    if args.record:
+        response = httpx.get(
+            "https://nyaa.si/",
+            params={"page": "rss", "q": args.record, "c": "1_2", "f": "2"},
+            follow_redirects=True,
+        )
+        response.raise_for_status()
+        sys.stdout.buffer.write(response.content)
+        return
+
+    feeds = [(path, open(path, "rb").read()) for path in args.feeds]
+    if not feeds:
+        feeds = [(f"synthetic ({args.items} items)", synthetic_feed(args.items))]
+
+    for name, data in feeds:
+        old, old_items = bench(parse_with_feedparser, data)
+        new, new_items = bench(parse_feed, data)
+        print(f"{name}: {len(data) / 1024:.1f} KiB")
+        print(f"  feedparser     {old * 1000:8.3f} ms  ({old_items} items)")
+        print(f"  NyaaFeedParser {new * 1000:8.3f} ms  ({new_items} items)")
+        print(f"  speedup        {old / new:8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+"""
+Compares the old and new encoding of torrent listings (GET /torrents/, /torrents/all).
+
+Usage (from the backend folder):
+    python benchmarks/torrent_list_bench.py                  # 10k synthetic torrents
+    python benchmarks/torrent_list_bench.py --torrents 500
+
+The old path builds a validated TorrentInfo per torrent (with the status map rebuilt
+on every call), lets FastAPI validate and dump the list again through
+response_model, and encodes it with json. The new path maps each torrent to a plain
+dict and encodes the list with orjson.
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+import orjson
+from pydantic import TypeAdapter
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+# The service module loads the settings on import; the values are never used here.
+os.environ.setdefault("DATABASE_URL", "postgresql+asyncpg://bench@localhost/bench")
+os.environ.setdefault("SECRET_KEY", "bench")
+os.environ.setdefault("QBITTORRENT_HOST", "http://localhost:8080")
+
+from app.schemas.torrent import TorrentInfo  # noqa: E402
+from app.services.qbittorrent_service import (  # noqa: E402
+    STATUS_MAP,
+    qbittorrent_service,
+)
+
+STATES = list(STATUS_MAP) + ["stoppedUP", "forcedMetaDL"]
+
+
+def synthetic_torrents(count: int) -> list[dict]:
+    """Torrents shaped like sync/maindata state cache entries."""
+    return [
+        {
+            "hash": f"{i:040x}",
+            "name": f"[SubsPlease] Some Show - {i % 24 + 1:02d} (1080p) [{i:08X}].mkv",
+            "size": 1_400_000_000 + i,
+            "progress": (i % 1000) / 1000,
+            "state": STATES[i % len(STATES)],
+            "num_seeds": i % 500,
+            "num_leechs": i % 37,
+            "added_on": 1_745_000_000 + i,
+            "dlspeed": i % 100_000,
+            "upspeed": i % 50_000,
+            "save_path": "/downloads",
+        }
+        for i in range(count)
+    ]
+
+
+def map_torrent_info_old(torrent_dict: dict) -> TorrentInfo:
+    """The previous map_torrent_info."""
+    state_str = str(torrent_dict.get("state", "unknown"))
+    status_map = dict(STATUS_MAP)  # rebuilt per call, as before
+    return TorrentInfo(
+        hash=torrent_dict.get("hash", "N/A"),
+        name=torrent_dict.get("name", "N/A"),
+        size=torrent_dict.get("size", 0),
+        progress=round(torrent_dict.get("progress", 0.0) * 100, 2),
+        status=status_map.get(state_str, state_str.capitalize()),
+        num_seeds=torrent_dict.get("num_seeds", 0),
+        num_leechs=torrent_dict.get("num_leechs", 0),
+        added_on=torrent_dict.get("added_on", 0),
+    )
+
+
+RESPONSE_MODEL = TypeAdapter(list[TorrentInfo])
+
+
+def encode_old(torrents: list[dict]) -> bytes:
+    models = [map_torrent_info_old(t) for t in torrents]
+    # What FastAPI does with response_model and the default JSONResponse.
+    content = RESPONSE_MODEL.dump_python(
+        RESPONSE_MODEL.validate_python(models, from_attributes=True), mode="json"
+    )
+    return json.dumps(
+        content, ensure_ascii=False, allow_nan=False, separators=(",", ":")
+    ).encode()
+
+
+def encode_new(torrents: list[dict]) -> bytes:
+    return orjson.dumps([qbittorrent_service.torrent_info_dict(t) for t in torrents])
+
+
+def bench(fn, torrents: list[dict], min_time: float = 1.0) -> tuple[float, int]:
+    """Returns (seconds per call, encoded bytes)."""
+    size = len(fn(torrents))
+    runs = 0
+    start = time.perf_counter()
+    while time.perf_counter() - start < min_time:
+        fn(torrents)
+        runs += 1
+    return (time.perf_counter() - start) / runs, size
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--torrents", type=int, default=10_000, help="List size")
+    args = parser.parse_args()
+
+    torrents = synthetic_torrents(args.torrents)
+    if orjson.loads(encode_old(torrents)) != orjson.loads(encode_new(torrents)):
+        sys.exit("Old and new encodings differ.")
+
+    old, size = bench(encode_old, torrents)
+    new, _ = bench(encode_new, torrents)
+    per = 1_000_000 / len(torrents)
+    print(f"{len(torrents)} torrents, {size / 1024:.0f} KiB of JSON")
+    print(
+        f"  model + response_model + json {old * 1000:8.2f} ms  {old * per:6.2f} us/torrent"
+    )
+    print(
+        f"  dict + orjson                 {new * 1000:8.2f} ms  {new * per:6.2f} us/torrent"
+    )
+    print(f"  speedup                       {old / new:8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,6 @@
+import os
+
+# The settings are loaded on import; nothing here talks to these services.
+os.environ.setdefault("DATABASE_URL", "postgresql+asyncpg://test@localhost/test")
+os.environ.setdefault("SECRET_KEY", "test")
+os.environ.setdefault("QBITTORRENT_HOST", "http://localhost:8080")
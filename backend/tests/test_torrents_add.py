@@ -0,0 +1,75 @@
+import datetime
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.api.deps import get_current_user, get_torrent_repository
+from app.core.bencode import torrent_info_hash
+from app.main import app
+from app.schemas.user import User
+from app.services.qbittorrent_service import qbittorrent_service
+
+
+class FakeTorrentRepository:
+    def __init__(self):
+        self.locked: list[str] = []
+        self.links: list[tuple[int, str]] = []
+
+    async def lock_torrent_hashes(self, hashes: list[str]) -> None:
+        self.locked.extend(hashes)
+
+    async def link_torrent(self, user_id: int, torrent_hash: str):
+        self.links.append((user_id, torrent_hash))
+        return object()
+
+
+@pytest.fixture
+def torrent_repo():
+    repo = FakeTorrentRepository()
+    app.dependency_overrides[get_current_user] = lambda: User(
+        id=1,
+        username="alice",
+        email="alice@example.com",
+        is_active=True,
+        is_admin=False,
+        created_at=datetime.datetime.now(datetime.timezone.utc),
+    )
+    app.dependency_overrides[get_torrent_repository] = lambda: repo
+    yield repo
+    app.dependency_overrides.clear()
+
+
+def test_malformed_torrent_url_is_rejected(torrent_repo, monkeypatch):
+    async def fetch_torrent_file(url: str) -> bytes:
+        return b"<html>not a torrent</html>"
+
+    monkeypatch.setattr(qbittorrent_service, "_fetch_torrent_file", fetch_torrent_file)
+
+    response = TestClient(app).post(
+        "/api/v1/torrents/", json={"magnet_link": "https://example.com/show.torrent"}
+    )
+
+    assert response.status_code == 400
+    assert "not a valid torrent" in response.json()["detail"]
+    assert torrent_repo.links == []
+
+
+def test_torrent_url_hash_is_locked_before_add(torrent_repo, monkeypatch):
+    torrent_file = b"d4:infod6:lengthi1e4:name5:a.mkv12:piece lengthi16384eee"
+
+    async def fetch_torrent_file(url: str) -> bytes:
+        return torrent_file
+
+    async def add_torrent_source(source, **kwargs):
+        assert torrent_repo.locked == [source.info_hash]
+        return source.info_hash
+
+    monkeypatch.setattr(qbittorrent_service, "_fetch_torrent_file", fetch_torrent_file)
+    monkeypatch.setattr(qbittorrent_service, "add_torrent_source", add_torrent_source)
+
+    response = TestClient(app).post(
+        "/api/v1/torrents/", json={"magnet_link": "https://example.com/show.torrent"}
+    )
+
+    assert response.status_code == 202
+    assert torrent_repo.links == [(1, torrent_info_hash(torrent_file))]
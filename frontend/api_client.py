@@ -1,4 +1,5 @@
 import os
+import json
 from dotenv import load_dotenv
 import httpx
 from rich import print
@@ -41,16 +42,67 @@ def test_anilist_account():
     return response.json()
 
 
-def get_watchlist():
-    response = httpx.get(f"{BASE_URL}/watchlist/", headers=headers, timeout=20.0)
-    response.raise_for_status()
-    return response.json()
+# Last ETag and body per listing URL, so unchanged polls are answered with 304.
+_conditional_cache: dict[str, tuple[str, object]] = {}
 
 
-def get_torrents():
-    response = httpx.get(f"{BASE_URL}/torrents/", headers=headers)
+def _get_conditional(url: str, **kwargs):
+    request_headers = dict(headers)
+    cached = _conditional_cache.get(url)
+    if cached:
+        request_headers["If-None-Match"] = cached[0]
+    response = httpx.get(url, headers=request_headers, **kwargs)
+    if response.status_code == 304 and cached:
+        return cached[1]
     response.raise_for_status()
-    return response.json()
+    data = response.json()
+    etag = response.headers.get("ETag")
+    if etag:
+        _conditional_cache[url] = (etag, data)
+    else:
+        _conditional_cache.pop(url, None)
+    return data
+
+
+def get_watchlist():
+    return _get_conditional(f"{BASE_URL}/watchlist/", timeout=20.0)
+
+
+def get_torrents(**params):
+    """
+    The user's torrents. Without params the whole list is returned; the backend also
+    accepts limit/offset, sort (e.g. "added_on") with reverse=True, and filter
+    (e.g. "downloading"), and reports the match count in the X-Total-Count header.
+    """
+    query = str(httpx.QueryParams(params))
+    return _get_conditional(f"{BASE_URL}/torrents/" + (f"?{query}" if query else ""))
+
+
+def stream_torrents(info_hashes: list[str]):
+    """
+    Yields (event, data) pairs from the server-sent torrent progress stream.
+    Blocks between events, so run it off the UI thread.
+    """
+    params = {"hashes": ",".join(info_hashes)} if info_hashes else None
+    with httpx.stream(
+        "GET",
+        f"{BASE_URL}/torrents/stream",
+        headers=headers,
+        params=params,
+        timeout=httpx.Timeout(10.0, read=None),
+    ) as response:
+        response.raise_for_status()
+        event = "message"
+        data_lines = []
+        for line in response.iter_lines():
+            if line.startswith("event:"):
+                event = line[len("event:") :].strip()
+            elif line.startswith("data:"):
+                data_lines.append(line[len("data:") :].strip())
+            elif not line and data_lines:
+                yield event, json.loads("\n".join(data_lines))
+                event = "message"
+                data_lines = []
 
 
 def download(media_id: int, ep_num: int):
@@ -63,6 +115,29 @@ def download(media_id: int, ep_num: int):
     return response.json()
 
 
+def download_batch(media_id: int, first_ep: int = None, last_ep: int = None):
+    """Downloads a range of episodes (default: all unwatched aired ones)."""
+    response = httpx.post(
+        f"{BASE_URL}/watchlist/download/batch",
+        headers=headers,
+        json={
+            "media_id": media_id,
+            "first_episode": first_ep,
+            "last_episode": last_ep,
+            "preferred_quality": "1080p",
+        },
+        timeout=60.0,
+    )
+    response.raise_for_status()
+    return response.json()
+
+
+def get_job(job_id: int):
+    response = httpx.get(f"{BASE_URL}/jobs/{job_id}", headers=headers)
+    response.raise_for_status()
+    return response.json()
+
+
 def pause_torrent(info_hash: str):
     headers = {
         "Authorization": f"Bearer {token}",
@@ -4,9 +4,16 @@ from textual.geometry import clamp
 from textual.widgets import Static, Markdown, Button
 
 from enum import Enum, auto
+import time
+
+import httpx
 
 import api_client
 
+JOB_POLL_SECONDS = 1.0
+STREAM_RETRY_SECONDS = 1.0
+STREAM_RETRY_MAX_SECONDS = 30.0
+
 
 class Card(Static):
     def __init__(self, info: dict) -> None:
@@ -108,12 +115,10 @@ class Progress(VerticalScroll):
     def set_downloading(self) -> None:
         self.state = ProgressStates.downloading
 
-        self.download_timer = self.set_interval(5, self.download)
+        self.run_worker(self.download, thread=True, exclusive=True)
 
-    def set_downloaded(self, stop_timer=True) -> None:
+    def set_downloaded(self) -> None:
         self.state = ProgressStates.downloaded
-        if stop_timer:
-            self.download_timer.stop()
         self.state_button.label = f"▶️ {self.progress + 1}"
         self.state_button.disabled = False
 
@@ -136,15 +141,15 @@ class Progress(VerticalScroll):
                         self.minus_button.disabled = True
                         self.state_button.label = "↺ Finding torrent"
                         try:
-                            self.info_hash = api_client.download(
+                            self.job_id = api_client.download(
                                 self.media_id, self.progress + 1
-                            )["msg"].split()[-1]
+                            )["id"]
                         except Exception as e:
                             print(e)
                             self.set_next_episode_available()
                             return
 
-                        self.set_downloading()
+                        self.run_worker(self.find_torrent, thread=True, exclusive=True)
 
                     case ProgressStates.downloaded:
                         print("give the scp command")
@@ -160,12 +165,57 @@ class Progress(VerticalScroll):
         self.minus_button.disabled = self.progress == 0
         self.plus_button.disabled = self.progress == self.max_progress
 
+    def find_torrent(self) -> None:
+        """Polls the server's download job until it has a torrent (runs in a worker thread)."""
+        while True:
+            try:
+                job = api_client.get_job(self.job_id)
+            except Exception as e:
+                print(e)
+                job = {"status": "failed"}
+            match job["status"]:
+                case "succeeded":
+                    self.info_hash = job["torrent_hash"]
+                    self.app.call_from_thread(self.set_downloading)
+                    return
+                case "failed":
+                    print(job.get("last_error"))
+                    self.app.call_from_thread(self.set_next_episode_available)
+                    return
+            time.sleep(JOB_POLL_SECONDS)
+
     def download(self) -> None:
-        for torrent in api_client.get_torrents():
-            print(torrent["hash"], self.info_hash)
-            if torrent["hash"] == self.info_hash:
-                print(torrent)
-                progress = clamp(torrent["progress"], 0.0, 100.0)
-                self.state_button.label = f"{progress:.2f} %"
-                if abs(progress - 100.0) <= 0.01:
-                    self.set_downloaded()
+        """Follows the server's progress stream for this torrent (runs in a worker thread)."""
+        retry_delay = STREAM_RETRY_SECONDS
+        while True:
+            try:
+                for event, data in api_client.stream_torrents([self.info_hash]):
+                    retry_delay = STREAM_RETRY_SECONDS
+                    if event == "error":
+                        self.app.call_from_thread(
+                            self.show_stream_error, data.get("detail")
+                        )
+                        continue
+                    if event not in ("snapshot", "update"):
+                        continue
+                    for torrent in data:
+                        if torrent["hash"] == self.info_hash:
+                            progress = clamp(torrent["progress"], 0.0, 100.0)
+                            self.app.call_from_thread(
+                                self.show_download_progress, progress
+                            )
+                            if abs(progress - 100.0) <= 0.01:
+                                self.app.call_from_thread(self.set_downloaded)
+                                return
+            except (httpx.HTTPError, ValueError) as e:
+                self.app.call_from_thread(self.show_stream_error, str(e))
+            # The stream ended or failed before the download finished: reconnect.
+            time.sleep(retry_delay)
+            retry_delay = min(retry_delay * 2, STREAM_RETRY_MAX_SECONDS)
+
+    def show_stream_error(self, detail) -> None:
+        print(detail)
+        self.state_button.label = "⚠ Reconnecting"
+
+    def show_download_progress(self, progress: float) -> None:
+        self.state_button.label = f"{progress:.2f} %"